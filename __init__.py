@@ -33,28 +33,56 @@ if "bpy" in locals():
     import importlib
     reloadable_modules = [
         "functions",
+        "radial_math",
+        "geometry",
+        "geometry_nodes",
+        "registry",
+        "profiling",
+        "replay",
         "radial_array",
         "radial_instances",
+        "layouts",
+        "batch",
         "ui"
     ]
     for module in reloadable_modules:
         if module in locals():
             importlib.reload(locals()[module])
 else:
-    from . import functions, radial_array, radial_instances, ui
+    # numpy based radial_math and geometry modules are imported on first use of the tools,
+    # batch module is only imported by command line tools
+    from . import functions, geometry_nodes, registry, profiling, replay, radial_array, radial_instances, layouts, ui
 
 
 import bpy
+import sys
+import time
 
 
 def register():
+    start = time.perf_counter()
+    profiling.register()
+    registry.register()
     radial_array.register()
     radial_instances.register()
-    ui.register()
+    layouts.register()
+    # panels are only drawn with the interface
+    if not bpy.app.background:
+        ui.register()
+    profiling.report_registration("register", time.perf_counter() - start)
 
 
 def unregister():
+    start = time.perf_counter()
     radial_array.unregister()
     radial_instances.unregister()
-    ui.unregister()
+    layouts.unregister()
+    if not bpy.app.background:
+        ui.unregister()
+    registry.unregister()
+    geometry = sys.modules.get(__name__ + ".geometry")
+    if geometry is not None:
+        geometry.unregister()
+    profiling.unregister()
+    profiling.report_registration("unregister", time.perf_counter() - start)
     
\ No newline at end of file
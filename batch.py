@@ -0,0 +1,154 @@
+'''Headless batch processing of radial arrays and radial duplicates.
+
+A job is a dict, usually loaded from JSON, run on the open file without a 3D view:
+
+    {"action": "ADD", "objects": ["Gear*"], "segments": 32, "spin_axis": "LOCAL_Z", "center": "ORIGIN"}
+
+Actions are ADD, REFRESH, APPLY and DUPLICATE. Objects are name patterns, all objects of the scene
+of the types the action works on if omitted, DUPLICATE only duplicates objects with geometry. Center is "ORIGIN", "CURSOR" or a world location, refreshed arrays keep their centers
+if it's omitted or "KEEP". View aligned axis is the world Z axis in background mode. tools/radial_batch.py runs jobs on many files in background Blender workers.
+'''
+
+from fnmatch import fnmatchcase
+from .radial_array import (BACKEND_ITEMS, add_radial_array, apply_radial_array, convert_radial_array, get_apply_error,
+    get_merge_threshold, get_radial_array, get_shared_helpers, refresh_radial_array)
+from .radial_instances import OUTPUT_MODE_ITEMS, PlacementIndex, duplicate_radially
+from .registry import SPIN_AXIS_ITEMS, get_indexed_objects, get_registered_arrays
+
+
+JOB_ACTIONS = ('ADD', 'REFRESH', 'APPLY', 'DUPLICATE')
+ACTION_OBJECT_TYPES = {
+    'ADD': ('MESH', 'CURVE'),
+    'REFRESH': ('MESH', 'CURVE'),
+    'APPLY': ('MESH',),
+    # cameras, lights, empties and other helpers aren't duplicated, even when their names match
+    'DUPLICATE': ('MESH', 'CURVE', 'SURFACE', 'META', 'FONT', 'CURVES', 'POINTCLOUD', 'VOLUME', 'GPENCIL', 'GREASEPENCIL'),
+}
+JOB_DEFAULTS = {
+    "objects": None,
+    "segments": 6,
+    "spin_axis": 'LOCAL_Z',
+    "center": None,
+    "force_new": False,
+    "backend": 'MODIFIER',
+    "viewport_segments": None,
+    "share_helper": False,
+    "update_merge_threshold": True,
+    "output_mode": 'OBJECTS',
+    "pattern": None,
+    "skip_existing": True,
+}
+
+
+def get_job_spec(job):
+    '''Job with defaults of missing keys, raises ValueError if the job is invalid'''
+    spec = dict(JOB_DEFAULTS, **job)
+    enums = (
+        ("action", JOB_ACTIONS),
+        ("spin_axis", [item[0] for item in SPIN_AXIS_ITEMS]),
+        ("backend", [item[0] for item in BACKEND_ITEMS]),
+        ("output_mode", [item[0] for item in OUTPUT_MODE_ITEMS]),
+    )
+    for key, values in enums:
+        if spec.get(key) not in values:
+            raise ValueError("%s must be one of %s, got %r" % (key, ", ".join(values), spec.get(key)))
+    if not isinstance(spec["segments"], int) or spec["segments"] < 1:
+        raise ValueError("segments must be a positive integer, got %r" % (spec["segments"],))
+    center = spec["center"]
+    if center not in (None, 'ORIGIN', 'CURSOR', 'KEEP') and not (isinstance(center, (list, tuple)) and len(center) == 3):
+        raise ValueError("center must be ORIGIN, CURSOR, KEEP or a location, got %r" % (center,))
+    return spec
+
+
+def get_job_objects(scene, patterns, types=None):
+    '''Objects of the scene with names matching any of the patterns, all objects if patterns is None'''
+    obs = [ob for ob in scene.objects if types is None or ob.type in types]
+    if patterns is not None:
+        obs = [ob for ob in obs if any(fnmatchcase(ob.name, pattern) for pattern in patterns)]
+    return obs
+
+
+def add_array(context, spec, ob):
+    add_radial_array(context, spec["segments"], spec["spin_axis"], spec["force_new"], spec["center"] not in (None, 'ORIGIN', 'KEEP'), ob,
+                     spec["shared_helpers"], spec["backend"], spec["viewport_segments"], spec["indexed_objects"])
+    return 'OK', None
+
+
+def refresh_array(context, spec, ob):
+    center = spec["center"] or 'KEEP'
+    if center not in ('ORIGIN', 'KEEP'):
+        center = 'CURSOR'
+    array = spec["registered_arrays"].get(ob)
+    if array is None:
+        return 'SKIPPED', "no registered radial array"
+    refresh_radial_array(context, ob, array, spec["merge_threshold"], center)
+    return 'OK', None
+
+
+def apply_array(context, spec, ob):
+    array = get_radial_array(ob)
+    error = "no radial array" if array is None else get_apply_error(ob, array)
+    if error is not None:
+        return 'SKIPPED', error
+    if array.type == 'NODES':
+        array = convert_radial_array(context, ob, array, 'MODIFIER')
+    apply_radial_array(ob, array)
+    return 'OK', None
+
+
+def duplicate_object(context, spec, ob):
+    # duplicates are placed around the 3D cursor
+    if spec["center"] in (None, 'ORIGIN', 'KEEP'):
+        context.scene.cursor.location = ob.matrix_world.translation
+    dupli_obs = duplicate_radially(context, spec["segments"], spec["spin_axis"], output_mode=spec["output_mode"], ob=ob,
+                                   pattern=spec["pattern"], skip_existing=spec["skip_existing"], index=spec["placement_index"])
+    return 'OK', "%d duplicates" % len(dupli_obs)
+
+
+JOB_FUNCTIONS = {
+    'ADD': add_array,
+    'REFRESH': refresh_array,
+    'APPLY': apply_array,
+    'DUPLICATE': duplicate_object,
+}
+
+
+def run_job(context, job):
+    '''Run the job on objects of the scene of the context.
+    Returns a dict with the action and status of every object - OK, SKIPPED or FAILED with a message.
+    Failed objects don't stop the job, the 3D cursor is restored after the job'''
+    spec = get_job_spec(job)
+    obs = get_job_objects(context.scene, spec["objects"], ACTION_OBJECT_TYPES[spec["action"]])
+    spec["shared_helpers"] = get_shared_helpers(context.scene) if spec["share_helper"] else None
+    # scene wide lookups are built once for all objects of the job
+    spec["indexed_objects"] = get_indexed_objects(context.scene) if spec["action"] == 'ADD' else None
+    is_refresh = spec["action"] == 'REFRESH'
+    spec["registered_arrays"] = dict(get_registered_arrays(context.scene)) if is_refresh else None
+    spec["merge_threshold"] = get_merge_threshold(context) if is_refresh and spec["update_merge_threshold"] else None
+    use_index = spec["action"] == 'DUPLICATE' and spec["skip_existing"]
+    spec["placement_index"] = PlacementIndex(context.scene.objects) if use_index else None
+    job_function = JOB_FUNCTIONS[spec["action"]]
+    cursor = context.scene.cursor
+    cursor_loc = cursor.location.copy()
+    if isinstance(spec["center"], (list, tuple)):
+        cursor.location = spec["center"]
+
+    results = []
+    try:
+        for ob in obs:
+            name = ob.name
+            try:
+                status, message = job_function(context, spec, ob)
+            except Exception as e:
+                status, message = 'FAILED', "%s: %s" % (type(e).__name__, e)
+            results.append({"object": name, "status": status, "message": message})
+    finally:
+        cursor.location = cursor_loc
+    return {"action": spec["action"], "objects": results}
+
+
+def run_jobs(context, jobs):
+    '''Run a job or a list of jobs in order, returns the list of job results'''
+    if isinstance(jobs, dict):
+        jobs = [jobs]
+    return [run_job(context, job) for job in jobs]
@@ -0,0 +1,353 @@
+'''Headless benchmark suite for RadialTools.
+
+Run the benchmarks in background Blender:
+
+    blender --background --factory-startup --python benchmarks/benchmark.py -- --output results.json
+
+Add --quick to run a reduced sweep. Compare two result files with any Python 3 with:
+
+    python benchmarks/benchmark.py --compare old.json new.json
+
+Every case records the time of the tool call, the time of the depsgraph evaluation
+that follows it, the number of data-blocks it added to bpy.data, the growth of mesh
+data in bpy.data and the growth of the current resident memory of the Blender process.
+Resident memory is read with psutil if it's installed, otherwise from /proc, and is
+null where neither is available.
+'''
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VERTEX_COUNTS = (1000, 10000, 100000, 500000, 2000000)
+SEGMENT_COUNTS = (2, 6, 32, 128, 512, 1000)
+STACK_DEPTHS = (0, 10, 30, 60)
+SPIN_AXES = ('LOCAL_X', 'LOCAL_Y', 'LOCAL_Z', 'VIEW_Z')
+MATRIX_COUNTS = (10, 1000, 10000, 100000)
+ARRAY_OBJECT_COUNTS = (10, 100, 500)
+
+QUICK_VERTEX_COUNTS = (1000, 100000)
+QUICK_SEGMENT_COUNTS = (2, 32, 256)
+QUICK_STACK_DEPTHS = (0, 30)
+QUICK_ARRAY_OBJECT_COUNTS = (10, 100)
+
+# deform modifiers keep the evaluated vertex count of the stack constant
+STACK_MODIFIER_TYPES = ('DISPLACE', 'SMOOTH', 'CAST')
+
+# bytes of an attribute value by attribute data type
+ATTRIBUTE_SIZES = {
+    'FLOAT': 4, 'INT': 4, 'FLOAT_VECTOR': 12, 'FLOAT_COLOR': 16, 'BYTE_COLOR': 4, 'STRING': 1,
+    'BOOLEAN': 1, 'FLOAT2': 8, 'INT8': 1, 'INT32_2D': 8, 'QUATERNION': 16, 'FLOAT4X4': 64,
+}
+# bytes of topology of a mesh element, edge vertex indices, loop vertex and edge indices and polygon offsets
+TOPOLOGY_SIZES = {"vertices": 0, "edges": 8, "loops": 8, "polygons": 4}
+
+
+def import_addon():
+    '''Import the add-on package from the repository, whatever the folder is named'''
+    spec = importlib.util.spec_from_file_location(
+        "radial_tools", os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules["radial_tools"] = addon
+    spec.loader.exec_module(addon)
+    return addon
+
+
+def get_current_memory():
+    '''Current resident memory of the process in kilobytes, None if it can't be read'''
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return psutil.Process().memory_info().rss // 1024
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def count_ids():
+    import bpy
+    return {"objects": len(bpy.data.objects), "meshes": len(bpy.data.meshes), "collections": len(bpy.data.collections)}
+
+
+def get_mesh_data_size():
+    '''Number of mesh elements in bpy.data and bytes of their attributes and topology'''
+    import bpy
+    size = {key: 0 for key in TOPOLOGY_SIZES}
+    size["bytes"] = 0
+    for me in bpy.data.meshes:
+        for key, item_size in TOPOLOGY_SIZES.items():
+            count = len(getattr(me, key))
+            size[key] += count
+            size["bytes"] += count*item_size
+        # vertex positions are an attribute since Blender 3.5
+        if "position" not in me.attributes:
+            size["bytes"] += len(me.vertices)*12
+        for attribute in me.attributes:
+            size["bytes"] += len(attribute.data)*ATTRIBUTE_SIZES.get(attribute.data_type, 4)
+    return size
+
+
+def reset_scene():
+    import bpy
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    return bpy.context.scene
+
+
+def add_grid_object(scene, vertex_count, stack_depth=0):
+    '''Grid of quads next to the origin with vertex_count vertices and stack_depth modifiers'''
+    import bpy
+    import numpy as np
+
+    side = max(2, int(round(vertex_count ** .5)))
+    xs, ys = np.meshgrid(np.linspace(1, 2, side), np.linspace(-.5, .5, side))
+    coords = np.column_stack((xs.ravel(), ys.ravel(), np.zeros(side*side))).astype(np.float32)
+
+    quad_x, quad_y = np.meshgrid(np.arange(side - 1), np.arange(side - 1))
+    first = (quad_y*side + quad_x).ravel()
+    loops = np.column_stack((first, first + 1, first + side + 1, first + side)).ravel().astype(np.int32)
+    face_count = len(first)
+
+    me = bpy.data.meshes.new("Benchmark Grid")
+    me.vertices.add(len(coords))
+    me.vertices.foreach_set("co", coords.ravel())
+    me.loops.add(len(loops))
+    me.loops.foreach_set("vertex_index", loops)
+    me.polygons.add(face_count)
+    me.polygons.foreach_set("loop_start", np.arange(0, len(loops), 4, dtype=np.int32))
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        me.polygons.foreach_set("loop_total", np.full(face_count, 4, dtype=np.int32))
+    me.update(calc_edges=True)
+
+    ob = bpy.data.objects.new("Benchmark Object", me)
+    scene.collection.objects.link(ob)
+    for i in range(stack_depth):
+        mod = ob.modifiers.new(name="Stack %d" % i, type=STACK_MODIFIER_TYPES[i % len(STACK_MODIFIER_TYPES)])
+        if mod.type == 'DISPLACE':
+            mod.strength = 0
+
+    bpy.context.view_layer.objects.active = ob
+    bpy.context.view_layer.update()
+    return ob
+
+
+def measure(name, params, run):
+    '''Time run() and the depsgraph evaluation that follows it'''
+    import bpy
+
+    ids_before = count_ids()
+    data_before = get_mesh_data_size()
+    memory_before = get_current_memory()
+
+    start = time.perf_counter()
+    run()
+    time_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bpy.context.view_layer.update()
+    time_eval = time.perf_counter() - start
+
+    ids_after = count_ids()
+    data_after = get_mesh_data_size()
+    memory_after = get_current_memory()
+    result = {
+        "name": name,
+        "params": params,
+        "time_call": time_call,
+        "time_eval": time_eval,
+        "ids_added": {key: ids_after[key] - ids_before[key] for key in ids_after},
+        "mesh_data_added": {key: data_after[key] - data_before[key] for key in data_after},
+        "memory_growth_kb": None if memory_before is None or memory_after is None else memory_after - memory_before,
+    }
+    print("%-40s %-60s call %9.4fs  eval %9.4fs" % (name, json.dumps(params), time_call, time_eval))
+    return result
+
+
+def bench_radial_array(addon, vertex_counts, segment_counts, stack_depths):
+    import bpy
+    add_radial_array = addon.radial_array.add_radial_array
+    results = []
+
+    backends = ['MODIFIER']
+    if addon.geometry_nodes.is_supported():
+        backends.append('GEOMETRY_NODES')
+
+    cases = [(vertex_count, 6, 0, 'LOCAL_Z', backend) for vertex_count in vertex_counts for backend in backends]
+    cases += [(10000, segments, 0, 'LOCAL_Z', backend) for segments in segment_counts for backend in backends]
+    cases += [(1000, 6, depth, 'LOCAL_Z', 'MODIFIER') for depth in stack_depths]
+    cases += [(10000, 6, 0, spin_axis, 'MODIFIER') for spin_axis in SPIN_AXES]
+
+    for vertex_count, segments, depth, spin_axis, backend in cases:
+        params = {"vertices": vertex_count, "segments": segments, "stack_depth": depth, "spin_axis": spin_axis}
+        # keep keys of modifier cases comparable with results of older versions
+        if backend != 'MODIFIER':
+            params["backend"] = backend
+
+        scene = reset_scene()
+        add_grid_object(scene, vertex_count, depth)
+        results.append(measure("add_radial_array", params,
+            lambda: add_radial_array(bpy.context, segments, spin_axis, False, False, backend=backend)))
+
+        # modal update path - radial array already exists, only count changes
+        results.append(measure("add_radial_array update", params,
+            lambda: add_radial_array(bpy.context, segments + 1, spin_axis, False, False)))
+
+    return results
+
+
+def bench_refresh_radial_arrays(addon, object_counts):
+    import bpy
+    radial_array = addon.radial_array
+    results = []
+    for object_count in object_counts:
+        scene = reset_scene()
+        for i in range(object_count):
+            ob = add_grid_object(scene, 100)
+            ob.location.x = i*3
+            radial_array.add_radial_array(bpy.context, 6, 'LOCAL_Z', False, False, ob)
+        bpy.context.view_layer.update()
+
+        # unit scale change updates merge distances, moved objects update helpers
+        scene.unit_settings.scale_length = .01
+        for ob in scene.objects:
+            if ob.type == 'MESH':
+                ob.location.y += 1
+        bpy.context.view_layer.update()
+        results.append(measure("refresh_radial_arrays", {"objects": object_count},
+            lambda: radial_array.refresh_radial_arrays(bpy.context)))
+    return results
+
+
+def bench_duplicate_radially(addon, segment_counts, stack_depths):
+    import bpy
+    radial_instances = addon.radial_instances
+    results = []
+
+    cases = [(count, 0, 'LOCAL_Z', mode) for count in segment_counts for mode in ('OBJECTS', 'COLLECTION')]
+    cases += [(32, depth, 'LOCAL_Z', 'OBJECTS') for depth in stack_depths]
+    cases += [(32, 0, spin_axis, 'OBJECTS') for spin_axis in SPIN_AXES]
+
+    for count, depth, spin_axis, output_mode in cases:
+        params = {"count": count, "stack_depth": depth, "spin_axis": spin_axis, "output_mode": output_mode}
+
+        scene = reset_scene()
+        ob = add_grid_object(scene, 1000, depth)
+        results.append(measure("duplicate_radially", params,
+            lambda: radial_instances.duplicate_radially(bpy.context, count, spin_axis, output_mode=output_mode)))
+
+        # modal update paths on a pool of duplicates
+        scene = reset_scene()
+        ob = add_grid_object(scene, 1000, depth)
+        pool = radial_instances.DuplicatePool(bpy.context, ob, output_mode)
+        radial_instances.duplicate_radially(bpy.context, count, spin_axis, pool)
+        bpy.context.view_layer.update()
+        results.append(measure("modal count up", params,
+            lambda: radial_instances.duplicate_radially(bpy.context, count + 1, spin_axis, pool)))
+        results.append(measure("modal count down", params,
+            lambda: radial_instances.duplicate_radially(bpy.context, count, spin_axis, pool)))
+        results.append(measure("modal axis change", params,
+            lambda: radial_instances.duplicate_radially(bpy.context, count, 'LOCAL_X', pool)))
+        results.append(measure("modal cancel", params, pool.clear))
+
+    return results
+
+
+def bench_radial_math(addon, matrix_counts):
+    import numpy as np
+    # radial_math is loaded on first use of the tools
+    radial_math = importlib.import_module(addon.__name__ + ".radial_math")
+    results = []
+    for count in matrix_counts:
+        start = time.perf_counter()
+        radial_math.radial_matrices((0, 0, 0), (0, 0, 1), count, np.identity(4))
+        results.append({"name": "radial_matrices", "params": {"count": count},
+                        "time_call": time.perf_counter() - start, "time_eval": 0.0})
+
+        # the same number of matrices in 10 rings and in a helix
+        start = time.perf_counter()
+        radial_math.pattern_matrices((0, 0, 0), (0, 0, 1), count // 10, np.identity(4), rings=10, ring_offset=1.0)
+        radial_math.pattern_matrices((0, 0, 0), (0, 0, 1), count, np.identity(4), turns=count / 100, step_height=.01)
+        results.append({"name": "pattern_matrices", "params": {"count": count},
+                        "time_call": time.perf_counter() - start, "time_eval": 0.0})
+    return results
+
+
+def run(args):
+    import bpy
+    addon = import_addon()
+    # properties of the radial array registry are added on registration
+    addon.register()
+    quick = args.quick
+
+    results = [{"name": "register", "params": {}, "time_call": addon.profiling.registration_times["register"], "time_eval": 0.0}]
+    results += bench_radial_math(addon, MATRIX_COUNTS)
+    results += bench_radial_array(addon,
+        QUICK_VERTEX_COUNTS if quick else VERTEX_COUNTS,
+        QUICK_SEGMENT_COUNTS if quick else SEGMENT_COUNTS,
+        QUICK_STACK_DEPTHS if quick else STACK_DEPTHS)
+    results += bench_refresh_radial_arrays(addon, QUICK_ARRAY_OBJECT_COUNTS if quick else ARRAY_OBJECT_COUNTS)
+    results += bench_duplicate_radially(addon,
+        QUICK_SEGMENT_COUNTS if quick else SEGMENT_COUNTS,
+        QUICK_STACK_DEPTHS if quick else STACK_DEPTHS)
+
+    report = {
+        "addon_version": list(addon.bl_info["version"]),
+        "blender_version": bpy.app.version_string,
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "quick": quick,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Results saved to %s" % args.output)
+
+
+def case_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(old_path, new_path):
+    '''Print time ratios of cases present in both result files'''
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    old_results = {case_key(result): result for result in old["results"]}
+    print("%-40s %-60s %10s %10s" % ("case", "params", "call", "eval"))
+    for result in new["results"]:
+        old_result = old_results.get(case_key(result))
+        if old_result is None:
+            continue
+        ratios = []
+        for key in ("time_call", "time_eval"):
+            ratios.append("%9.2fx" % (result[key] / old_result[key]) if old_result[key] else "%10s" % "-")
+        print("%-40s %-60s %s %s" % (result["name"], json.dumps(result["params"]), *ratios))
+
+
+def parse_args():
+    # blender passes script arguments after "--"
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="RadialTools benchmark suite")
+    parser.add_argument("--output", default="radial_tools_benchmark.json", help="Path of the result JSON file")
+    parser.add_argument("--quick", action="store_true", help="Run a reduced sweep")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files instead of running")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args)
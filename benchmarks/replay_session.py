@@ -0,0 +1,73 @@
+'''Replay a recorded modal session in background Blender and measure latency of every event.
+
+Enable "Record Modal Events" in the Timings panel, run a modal tool and replay the saved file:
+
+    blender --background --factory-startup --python benchmarks/replay_session.py -- session.json --output latencies.json
+
+The session is replayed on a generated grid object, the same way for every run, so latencies
+of two add-on versions can be compared. Work the tools defer to timers is done after every event.
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from benchmark import add_grid_object, import_addon, reset_scene
+
+
+def get_modal_classes(addon):
+    '''Modal logic classes by idnames of their operators'''
+    return {
+        addon.radial_array.OBJECT_OT_radial_array_modal.bl_idname: addon.radial_array.RadialArrayModal,
+        addon.radial_instances.OBJECT_OT_duplicate_radially_modal.bl_idname: addon.radial_instances.DuplicateRadiallyModal,
+    }
+
+
+def run(args):
+    import bpy
+
+    addon = import_addon()
+    addon.register()
+    idname, properties, events = addon.replay.load_recording(args.session)
+    modal_class = get_modal_classes(addon)[idname]
+
+    scene = reset_scene()
+    ob = add_grid_object(scene, args.vertex_count)
+    ob.select_set(True)
+
+    session = addon.replay.new_session(modal_class, properties)
+    latencies, result = addon.replay.replay(bpy.context, session, events)
+
+    print("%-6s %-20s %-10s %12s" % ("event", "type", "value", "latency ms"))
+    for i, (event, latency) in enumerate(zip(events, latencies)):
+        print("%-6d %-20s %-10s %12.3f" % (i, event.type, event.value, latency*1000))
+    if latencies:
+        print("total %.3f ms, max %.3f ms, result %s" % (sum(latencies)*1000, max(latencies)*1000, ", ".join(result)))
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "session": os.path.abspath(args.session),
+            "operator": idname,
+            "blender_version": bpy.app.version_string,
+            "vertex_count": args.vertex_count,
+            "time": time.time(),
+            "result": sorted(result),
+            "events": [dict(event.as_dict(), latency=latency) for event, latency in zip(events, latencies)],
+        }, f, indent=2)
+
+
+def parse_args():
+    # blender passes script arguments after "--"
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Replay a recorded RadialTools modal session")
+    parser.add_argument("session", help="Path of the recorded session JSON file")
+    parser.add_argument("--output", default="radial_tools_replay.json", help="Path of the latency JSON file")
+    parser.add_argument("--vertex-count", type=int, default=10000, help="Number of vertices of the replayed object")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -1,45 +1,112 @@
-import blf
-
-def draw_text_line(text_line, newline_x, newline_y, align="LEFT", font=0, font_size=12):
-    offset_x = newline_x
-    for text, color in text_line:
-        draw_text(text, offset_x, newline_y, align, font, font_size, color)
-        offset_x += get_text_dimensions(text, font)[0]
-    newline_y -= get_text_dimensions("M", font)[1]*2
-    return newline_y
-
-
-def draw_text(text, pos_x, pos_y, align="LEFT", font=0, font_size=12, color=(1, 1, 1, 1)):
-    blf.size(font, font_size, 0)
-    blf.color(font, *color)
-    blf.enable(font, blf.SHADOW)
-    blf.shadow_offset(font, 1, -1)
-    blf.shadow(font, 3, *(0, 0, 0, 1))
-
-    if align == "RIGHT":
-        width, height = blf.dimensions(font, text)
-        blf.position(font, pos_x - width, pos_y, 0)
-    else:
-        blf.position(font, pos_x, pos_y, 0)
-
-    blf.draw(font, text)
-    
+from mathutils import Matrix
+
+text_dimensions_cache = {}
+
+
+def get_cached_text_dimensions(text, font=0, font_size=12):
+    '''Text dimensions measured once for every font and font size'''
+    key = (text, font, font_size)
+    dimensions = text_dimensions_cache.get(key)
+    if dimensions is None:
+        import blf
+        if len(text_dimensions_cache) > 4096:
+            text_dimensions_cache.clear()
+        blf.size(font, font_size, 0)
+        dimensions = text_dimensions_cache[key] = blf.dimensions(font, text)
+    return dimensions
+
+
+class OverlayLayout:
+    '''Modal overlay text next to the mouse position.
+    Positions of the text fragments are cached and recalculated only when the text, font,
+    UI scale, region size or sidebar overlap change, so redraws while orbiting the view only draw text'''
+    ui_width, ui_height, ui_offset = 250, 50, 50
     
-def get_text_dimensions(text, font=0):
-    return blf.dimensions(font, text)
+    def __init__(self, mouse_region_x, mouse_region_y, font=0):
+        self.mouse_region_x = mouse_region_x
+        self.mouse_region_y = mouse_region_y
+        self.font = font
+        self.font_size = 12
+        self.layout_key = None
+        self.fragments = []
+        
+    def update_layout(self, context, text_lines):
+        region = context.region
+        ui_scale = context.preferences.view.ui_scale
+        layout_key = (ui_scale, region.width, region.height, context.space_data.show_region_ui,
+                      context.preferences.system.use_region_overlap, get_sidebar_width(context), text_lines)
+        if layout_key == self.layout_key:
+            return
+        self.layout_key = layout_key
+        
+        font = self.font
+        font_size = self.font_size = int(18*ui_scale)
+        ui_offset = self.ui_offset*ui_scale
+        
+        safe_x, safe_y = get_safe_draw_x(context, self.ui_width + ui_offset), self.ui_height + ui_offset
+        mouse_offset_x = self.mouse_region_x + ui_offset
+        mouse_offset_y = self.mouse_region_y - ui_offset
+        newline_x = min(safe_x, mouse_offset_x)
+        newline_y = max(safe_y, mouse_offset_y)
+        line_height = get_cached_text_dimensions("M", font, font_size)[1]*2
+        
+        self.fragments = []
+        for text_line in text_lines:
+            offset_x = newline_x
+            for text, color in text_line:
+                self.fragments.append((text, offset_x, newline_y, color))
+                offset_x += get_cached_text_dimensions(text, font, font_size)[0]
+            newline_y -= line_height
+            
+    def draw(self, context, text_lines):
+        '''Draw lines of (text, color) fragments, colors have to be tuples'''
+        import blf
+        self.update_layout(context, text_lines)
+        
+        font = self.font
+        blf.size(font, self.font_size, 0)
+        blf.enable(font, blf.SHADOW)
+        blf.shadow_offset(font, 1, -1)
+        blf.shadow(font, 3, *(0, 0, 0, 1))
+        for text, pos_x, pos_y, color in self.fragments:
+            blf.color(font, *color)
+            blf.position(font, pos_x, pos_y, 0)
+            blf.draw(font, text)
 
 
-def get_safe_draw_x(context, ui_width):
-    '''Maximum x position of ui left side that doesn't cause overlap width sidebar'''
-    region_overlap = context.preferences.system.use_region_overlap
-    if context.space_data.show_region_ui and region_overlap:
+def get_selected_objects(context, use_selected, types=None):
+    '''Active object followed by other selected objects if use_selected is enabled, filtered by object types'''
+    obs = [context.object] if context.object is not None else []
+    if use_selected:
+        obs += [ob for ob in context.selected_objects if ob != context.object]
+    if types is not None:
+        obs = [ob for ob in obs if ob.type in types]
+    return obs
+
+
+def get_view3d(context):
+    '''3D view space of the context or None, for example in background mode'''
+    space = context.space_data
+    return space if space is not None and space.type == 'VIEW_3D' else None
+
+
+def get_view_matrix(context):
+    '''View matrix of the 3D view. Without a 3D view the view Z axis is the world Z axis'''
+    view3d = get_view3d(context)
+    return view3d.region_3d.view_matrix if view3d is not None else Matrix.Identity(4)
+
+
+def get_sidebar_width(context):
+    '''Width of the area of 3d view covered by sidebar'''
+    if context.space_data.show_region_ui and context.preferences.system.use_region_overlap:
         for region in context.area.regions:
             if region.type == 'UI':
-                offset_width = region.width # area of 3d view covered by sidebar
-                break
-    else:
-        offset_width = 0
-              
-    safe_x = context.region.width - offset_width - ui_width
+                return region.width
+    return 0
+
+
+def get_safe_draw_x(context, ui_width):
+    '''Maximum x position of ui left side that doesn't cause overlap width sidebar'''
+    safe_x = context.region.width - get_sidebar_width(context) - ui_width
     return safe_x
     
\ No newline at end of file
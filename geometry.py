@@ -0,0 +1,280 @@
+import bpy
+import numpy as np
+from collections import OrderedDict
+from mathutils import Vector
+
+
+BOX_FACES = ((0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3))
+BOUNDS_CACHE_SIZE = 256
+
+# local bounds by object data key, least recently used entries are evicted first
+bounds_cache = OrderedDict()
+# change stamps of cached object data bumped on geometry updates
+data_stamps = {}
+
+
+def get_local_coords(ob):
+    '''(N, 3) float32 array of mesh vertex or curve point coordinates in object space'''
+    if ob.type == 'MESH':
+        vertices = ob.data.vertices
+        coords = np.empty(len(vertices)*3, dtype=np.float32)
+        vertices.foreach_get("co", coords)
+        return coords.reshape(-1, 3)
+
+    elif ob.type == 'CURVE':
+        spline_coords = []
+        for spline in ob.data.splines:
+            # bezier points have 3d coordinates, nurbs and poly points have 4d ones
+            if spline.type == 'BEZIER':
+                points, size = spline.bezier_points, 3
+            else:
+                points, size = spline.points, 4
+            coords = np.empty(len(points)*size, dtype=np.float32)
+            points.foreach_get("co", coords)
+            spline_coords.append(coords.reshape(-1, size)[:, :3])
+        if spline_coords:
+            return np.concatenate(spline_coords)
+
+    return np.empty((0, 3), dtype=np.float32)
+
+
+def get_local_bounds(ob):
+    '''Minimum and maximum object space coordinates of the object data'''
+    coords = get_local_coords(ob)
+    if not len(coords):
+        coords = np.zeros((1, 3), dtype=np.float32)
+    return coords.min(axis=0), coords.max(axis=0)
+
+
+def get_data_key(data):
+    # pointers can be reused by new data-blocks, session uid tells them apart where it's available
+    return data.as_pointer(), getattr(data, "session_uid", None)
+
+
+def get_data_size(data):
+    if isinstance(data, bpy.types.Mesh):
+        return len(data.vertices)
+    if isinstance(data, bpy.types.Curve):
+        return len(data.splines)
+    return 0
+
+
+def get_cached_local_bounds(ob):
+    '''Local bounds of the object data, reused until the data changes'''
+    # module is loaded on first use, so its handlers are added with the first cached entry
+    if depsgraph_update_post not in bpy.app.handlers.depsgraph_update_post:
+        register()
+    data = ob.data
+    key = get_data_key(data)
+    stamp = (data_stamps.get(key, 0), get_data_size(data))
+    entry = bounds_cache.get(key)
+    if entry is not None and entry[0] == stamp:
+        bounds_cache.move_to_end(key)
+        return entry[1]
+
+    bounds = get_local_bounds(ob)
+    bounds_cache[key] = (stamp, bounds)
+    bounds_cache.move_to_end(key)
+    while len(bounds_cache) > BOUNDS_CACHE_SIZE:
+        evicted_key, entry = bounds_cache.popitem(last=False)
+        data_stamps.pop(evicted_key, None)
+    return bounds
+
+
+def get_cached_center(ob):
+    '''World location of the center of the local bounding box of the object data'''
+    bounds_min, bounds_max = get_cached_local_bounds(ob)
+    return ob.matrix_world @ Vector(((bounds_min + bounds_max) / 2).tolist())
+
+
+def mesh_from_arrays(name, coords, loop_vertices, loop_starts, edges=None, loop_edges=None):
+    '''New mesh from flat arrays of vertex coordinates, polygon loop vertex indices and polygon loop starts.
+    Edges are calculated from polygons unless (N, 2) edge vertex indices and loop edge indices are given'''
+    loop_starts = np.asarray(loop_starts, dtype=np.int32)
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(len(coords))
+    me.vertices.foreach_set("co", np.asarray(coords, dtype=np.float32).ravel())
+    me.loops.add(len(loop_vertices))
+    me.loops.foreach_set("vertex_index", np.asarray(loop_vertices, dtype=np.int32))
+    me.polygons.add(len(loop_starts))
+    me.polygons.foreach_set("loop_start", loop_starts)
+    # loop totals are calculated from loop starts since Blender 4.0
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        loop_totals = np.diff(np.append(loop_starts, len(loop_vertices))).astype(np.int32)
+        me.polygons.foreach_set("loop_total", loop_totals)
+    if edges is None:
+        me.update(calc_edges=True)
+        return me
+
+    me.edges.add(len(edges))
+    me.edges.foreach_set("vertices", np.asarray(edges, dtype=np.int32).ravel())
+    me.loops.foreach_set("edge_index", np.asarray(loop_edges, dtype=np.int32))
+    me.update(calc_edges_loose=True)
+    return me
+
+
+def new_bounds_mesh(ob, name):
+    '''Box mesh around the object data'''
+    bounds = get_cached_local_bounds(ob)
+    coords = [(bounds[x][0], bounds[y][1], bounds[z][2]) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+    return mesh_from_arrays(name, coords, np.ravel(BOX_FACES), range(0, 24, 4))
+
+
+def new_decimated_mesh(ob, name, vertex_limit):
+    '''Triangulated mesh with vertices of the object mesh clustered on a grid, so it has about vertex_limit vertices'''
+    me = ob.data
+    coords = get_local_coords(ob)
+    me.calc_loop_triangles()
+    tris = np.empty(len(me.loop_triangles)*3, dtype=np.int32)
+    me.loop_triangles.foreach_get("vertices", tris)
+    tris = tris.reshape(-1, 3)
+
+    # surface meshes fill about square root of grid cells
+    bounds_min, bounds_max = coords.min(axis=0), coords.max(axis=0)
+    cell_size = max((bounds_max - bounds_min).max() / max(vertex_limit ** .5, 1), 1e-6)
+    cells = np.floor((coords - bounds_min) / cell_size).astype(np.int64)
+    cells, clusters = np.unique(cells, axis=0, return_inverse=True)
+    clusters = clusters.ravel()
+
+    cluster_sizes = np.bincount(clusters, minlength=len(cells))[:, None]
+    cluster_coords = np.column_stack([np.bincount(clusters, coords[:, i], len(cells)) for i in range(3)]) / cluster_sizes
+
+    # remove triangles collapsed into a point or an edge and triangles that became the same
+    tris = clusters[tris]
+    tris = tris[(tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 2] != tris[:, 0])]
+    tris = tris[np.unique(np.sort(tris, axis=1), axis=0, return_index=True)[1]]
+
+    proxy = mesh_from_arrays(name, cluster_coords, tris.ravel(), range(0, len(tris)*3, 3))
+    for mat in me.materials:
+        proxy.materials.append(mat)
+    return proxy
+
+
+ATTRIBUTE_BUFFERS = {
+    'FLOAT': ("value", 1, np.float32),
+    'INT': ("value", 1, np.int32),
+    'INT8': ("value", 1, np.int32),
+    'INT32_2D': ("value", 2, np.int32),
+    'BOOLEAN': ("value", 1, bool),
+    'FLOAT_VECTOR': ("vector", 3, np.float32),
+    'FLOAT2': ("vector", 2, np.float32),
+    'FLOAT_COLOR': ("color", 4, np.float32),
+    'BYTE_COLOR': ("color", 4, np.float32),
+    'QUATERNION': ("value", 4, np.float32),
+    'FLOAT4X4': ("value", 16, np.float32),
+}
+ATTRIBUTE_DOMAINS = ('POINT', 'EDGE', 'FACE', 'CORNER')
+# edge data which isn't a generic attribute in all versions, crease and bevel weight are attributes since Blender 4.0
+EDGE_PROPERTIES = (("use_seam", bool), ("use_edge_sharp", bool), ("use_freestyle_mark", bool),
+                   ("crease", np.float32), ("bevel_weight", np.float32))
+
+
+def read_attribute(attribute):
+    key, size, dtype = ATTRIBUTE_BUFFERS[attribute.data_type]
+    values = np.empty(len(attribute.data)*size, dtype=dtype)
+    attribute.data.foreach_get(key, values)
+    return values.reshape(-1, size)
+
+
+def write_attribute(me, name, data_type, domain, values):
+    attribute = me.attributes.get(name) or me.attributes.new(name, data_type, domain)
+    attribute.data.foreach_set(ATTRIBUTE_BUFFERS[data_type][0], values.ravel())
+
+
+def get_generic_attributes(me):
+    '''Attributes of the mesh except positions and internal ones'''
+    if not hasattr(me, "attributes"):
+        return []
+    return [attribute for attribute in me.attributes if attribute.name != "position" and not attribute.name.startswith(".")]
+
+
+def get_uncopyable_attributes(me):
+    '''Names of generic attributes of the mesh which can't be copied with foreach_get'''
+    return [attribute.name for attribute in get_generic_attributes(me)
+            if attribute.data_type not in ATTRIBUTE_BUFFERS or attribute.domain not in ATTRIBUTE_DOMAINS]
+
+
+def copy_tiled_mesh_data(me, new_me, count, kept_vertices, kept_edges):
+    '''Copy materials, edge and face data and attributes of the mesh to the mesh made of count copies of it.
+    Point and edge attributes of copies are filtered by kept_vertices mask and kept_edges indices of
+    vertices and edges left after welding'''
+    for mat in me.materials:
+        new_me.materials.append(mat)
+
+    for key, dtype in (("material_index", np.int32), ("use_smooth", bool)):
+        values = np.empty(len(me.polygons), dtype=dtype)
+        me.polygons.foreach_get(key, values)
+        new_me.polygons.foreach_set(key, np.tile(values, count))
+
+    edge_rna = bpy.types.MeshEdge.bl_rna.properties
+    for key, dtype in EDGE_PROPERTIES:
+        if key not in edge_rna or edge_rna[key].is_readonly:
+            continue
+        values = np.empty(len(me.edges), dtype=dtype)
+        me.edges.foreach_get(key, values)
+        # writing edge flags adds their layers, so empty ones are skipped
+        if values.any():
+            new_me.edges.foreach_set(key, np.tile(values, count)[kept_edges])
+
+    for attribute in get_generic_attributes(me):
+        if attribute.data_type not in ATTRIBUTE_BUFFERS or attribute.domain not in ATTRIBUTE_DOMAINS:
+            continue
+        values = np.tile(read_attribute(attribute), (count, 1))
+        if attribute.domain == 'POINT':
+            values = values[kept_vertices]
+        elif attribute.domain == 'EDGE':
+            values = values[kept_edges]
+        write_attribute(new_me, attribute.name, attribute.data_type, attribute.domain, values)
+
+    # auto smooth is a mesh setting before Blender 4.1
+    if hasattr(me, "use_auto_smooth"):
+        new_me.use_auto_smooth = me.use_auto_smooth
+        new_me.auto_smooth_angle = me.auto_smooth_angle
+
+    # uv maps aren't generic attributes before Blender 3.5
+    for uv_layer in me.uv_layers:
+        if new_me.uv_layers.get(uv_layer.name) is None:
+            uvs = np.empty(len(uv_layer.data)*2, dtype=np.float32)
+            uv_layer.data.foreach_get("uv", uvs)
+            new_me.uv_layers.new(name=uv_layer.name).data.foreach_set("uv", np.tile(uvs, count))
+    if me.uv_layers:
+        new_me.uv_layers.active_index = me.uv_layers.active_index
+
+    # remove faces which became degenerate after welding
+    new_me.validate(clean_customdata=False)
+    new_me.update()
+
+
+@bpy.app.handlers.persistent
+def depsgraph_update_post(scene, depsgraph=None):
+    # depsgraph isn't passed to handlers before Blender 2.91, so changes can't be told apart
+    if depsgraph is None:
+        bounds_cache.clear()
+        return
+    # object updates are skipped, modifiers and transforms don't change the object data bounds,
+    # the data is in the updates itself when it's edited
+    for update in depsgraph.updates:
+        data = update.id.original
+        if isinstance(data, (bpy.types.Mesh, bpy.types.Curve)):
+            key = get_data_key(data)
+            if key in bounds_cache:
+                data_stamps[key] = data_stamps.get(key, 0) + 1
+
+
+@bpy.app.handlers.persistent
+def load_post(*args):
+    bounds_cache.clear()
+    data_stamps.clear()
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post)
+    bpy.app.handlers.load_post.append(load_post)
+
+
+def unregister():
+    if depsgraph_update_post in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post)
+        bpy.app.handlers.load_post.remove(load_post)
+    bounds_cache.clear()
+    data_stamps.clear()
@@ -0,0 +1,248 @@
+'''Geometry Nodes backend of the radial array.
+
+The object geometry is instanced around an object space axis by a generated node group,
+so radial arrays of this backend don't need helper empties. Segments, axis, center and
+merge distance are inputs of the modifier. Only points of boundary and loose edges are merged,
+because segments meet at their open boundaries. Points inside segments are never searched.
+Requires Blender 3.1 or newer.
+'''
+
+import bpy
+from math import tau
+
+
+MIN_BLENDER_VERSION = (3, 1, 0)
+NODE_GROUP_NAME = "Radial Array"
+NODE_GROUP_KEY = "radial_array_nodes"
+# version 2 merges boundary points only
+NODE_GROUP_VERSION = 2
+
+# named attribute node of imported layouts was added in Blender 3.2
+LAYOUT_MIN_BLENDER_VERSION = (3, 2, 0)
+LAYOUT_GROUP_NAME = "Radial Layout"
+LAYOUT_GROUP_KEY = "radial_layout_nodes"
+LAYOUT_GROUP_VERSION = 1
+
+INPUTS = (
+    ("Segments", 'NodeSocketInt', 6),
+    ("Axis", 'NodeSocketVector', (0.0, 0.0, 1.0)),
+    ("Center", 'NodeSocketVector', (0.0, 0.0, 0.0)),
+    ("Merge Distance", 'NodeSocketFloat', 0.0001),
+)
+
+
+def is_supported():
+    return bpy.app.version >= MIN_BLENDER_VERSION
+
+
+def is_layout_supported():
+    return bpy.app.version >= LAYOUT_MIN_BLENDER_VERSION
+
+
+def new_group_socket(ng, in_out, socket_type, name):
+    # node group interface replaced inputs and outputs in Blender 4.0
+    if hasattr(ng, "interface"):
+        return ng.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    sockets = ng.inputs if in_out == 'INPUT' else ng.outputs
+    return sockets.new(socket_type, name)
+
+
+def get_group_inputs(ng):
+    if hasattr(ng, "interface"):
+        return [item for item in ng.interface.items_tree if item.item_type == 'SOCKET' and item.in_out == 'INPUT']
+    return list(ng.inputs)
+
+
+def new_rotation_node(nodes):
+    '''Node making instance rotation from the axis and angle, returns the node and its rotation output'''
+    # rotation sockets were added in Blender 4.0
+    if hasattr(bpy.types, "FunctionNodeAxisAngleToRotation"):
+        node = nodes.new('FunctionNodeAxisAngleToRotation')
+    else:
+        node = nodes.new('FunctionNodeRotateEuler')
+        setattr(node, "rotation_type" if hasattr(node, "rotation_type") else "type", 'AXIS_ANGLE')
+    return node, node.outputs["Rotation"]
+
+
+def build_node_group():
+    '''Node group rotating instances of the geometry around the axis passing through the center'''
+    ng = bpy.data.node_groups.new(NODE_GROUP_NAME, 'GeometryNodeTree')
+    ng[NODE_GROUP_KEY] = NODE_GROUP_VERSION
+    new_group_socket(ng, 'INPUT', 'NodeSocketGeometry', "Geometry")
+    for name, socket_type, default in INPUTS:
+        socket = new_group_socket(ng, 'INPUT', socket_type, name)
+        socket.default_value = default
+        if name in ("Segments", "Merge Distance"):
+            socket.min_value = 1 if name == "Segments" else 0.0
+    new_group_socket(ng, 'OUTPUT', 'NodeSocketGeometry', "Geometry")
+
+    nodes, links = ng.nodes, ng.links
+    group_in = nodes.new('NodeGroupInput')
+    group_out = nodes.new('NodeGroupOutput')
+
+    # geometry is moved so the center is at the instance origin
+    neg_center = nodes.new('ShaderNodeVectorMath')
+    neg_center.operation = 'SCALE'
+    neg_center.inputs["Scale"].default_value = -1.0
+    links.new(group_in.outputs["Center"], neg_center.inputs[0])
+    to_center = nodes.new('GeometryNodeTransform')
+    links.new(group_in.outputs["Geometry"], to_center.inputs["Geometry"])
+    links.new(neg_center.outputs["Vector"], to_center.inputs["Translation"])
+
+    # one point at the center for every segment, rotated by index times segment angle
+    points = nodes.new('GeometryNodePoints')
+    links.new(group_in.outputs["Segments"], points.inputs["Count"])
+    links.new(group_in.outputs["Center"], points.inputs["Position"])
+    index = nodes.new('GeometryNodeInputIndex')
+    step = nodes.new('ShaderNodeMath')
+    step.operation = 'DIVIDE'
+    step.inputs[0].default_value = tau
+    links.new(group_in.outputs["Segments"], step.inputs[1])
+    angle = nodes.new('ShaderNodeMath')
+    angle.operation = 'MULTIPLY'
+    links.new(index.outputs["Index"], angle.inputs[0])
+    links.new(step.outputs["Value"], angle.inputs[1])
+    rotation, rotation_output = new_rotation_node(nodes)
+    links.new(group_in.outputs["Axis"], rotation.inputs["Axis"])
+    links.new(angle.outputs["Value"], rotation.inputs["Angle"])
+
+    instance = nodes.new('GeometryNodeInstanceOnPoints')
+    links.new(points.outputs[0], instance.inputs["Points"])
+    links.new(to_center.outputs["Geometry"], instance.inputs["Instance"])
+    links.new(rotation_output, instance.inputs["Rotation"])
+    realize = nodes.new('GeometryNodeRealizeInstances')
+    links.new(instance.outputs["Instances"], realize.inputs["Geometry"])
+    # boundary edges have less than two faces, selection of edges is true on their points
+    edge_neighbors = nodes.new('GeometryNodeInputMeshEdgeNeighbors')
+    is_boundary = nodes.new('ShaderNodeMath')
+    is_boundary.operation = 'LESS_THAN'
+    is_boundary.inputs[1].default_value = 1.5
+    links.new(edge_neighbors.outputs["Face Count"], is_boundary.inputs[0])
+    merge = nodes.new('GeometryNodeMergeByDistance')
+    links.new(realize.outputs["Geometry"], merge.inputs["Geometry"])
+    links.new(is_boundary.outputs["Value"], merge.inputs["Selection"])
+    links.new(group_in.outputs["Merge Distance"], merge.inputs["Distance"])
+    links.new(merge.outputs["Geometry"], group_out.inputs[0])
+
+    for x, node in enumerate((group_in, neg_center, to_center, instance, realize, merge, group_out)):
+        node.location = (x*200, 0)
+    for x, node in enumerate((index, step, angle, rotation)):
+        node.location = (x*200, -300)
+    points.location = (400, 200)
+    edge_neighbors.location = (800, -300)
+    is_boundary.location = (1000, -300)
+    return ng
+
+
+def get_node_group():
+    '''Radial array node group of the current file, it's added if it doesn't exist'''
+    for ng in bpy.data.node_groups:
+        if ng.get(NODE_GROUP_KEY) == NODE_GROUP_VERSION and ng.bl_idname == 'GeometryNodeTree':
+            return ng
+    return build_node_group()
+
+
+def new_nodes_array(ob, name="Radial Array"):
+    mod = ob.modifiers.new(name=name, type='NODES')
+    mod.node_group = get_node_group()
+    return mod
+
+
+def is_nodes_array(mod):
+    return mod.type == 'NODES' and mod.node_group is not None and NODE_GROUP_KEY in mod.node_group
+
+
+def get_input_identifiers(mod):
+    return {socket.name: socket.identifier for socket in get_group_inputs(mod.node_group)}
+
+
+def get_array_inputs(mod):
+    '''Values of segments, axis, center and merge distance inputs of the modifier by input names'''
+    identifiers = get_input_identifiers(mod)
+    inputs = {}
+    for name, socket_type, default in INPUTS:
+        value = mod.get(identifiers[name], default)
+        inputs[name] = tuple(value) if socket_type == 'NodeSocketVector' else value
+    return inputs
+
+
+def set_array_inputs(ob, mod, inputs):
+    '''Set inputs of the modifier from the dict of input names and values, only changed values are written'''
+    identifiers = get_input_identifiers(mod)
+    socket_types = {name: socket_type for name, socket_type, default in INPUTS}
+    changed = False
+    for name, value in inputs.items():
+        identifier = identifiers[name]
+        # id property types have to match socket types
+        if socket_types[name] == 'NodeSocketVector':
+            value = [float(v) for v in value]
+            if identifier in mod and list(mod[identifier]) == value:
+                continue
+        else:
+            value = int(value) if socket_types[name] == 'NodeSocketInt' else float(value)
+            if mod.get(identifier) == value:
+                continue
+        mod[identifier] = value
+        changed = True
+
+    # modifier inputs set as id properties don't tag the object for update
+    if changed:
+        ob.update_tag()
+
+
+def new_attribute_node(nodes, name):
+    '''Named vector attribute node, returns the node and its attribute output'''
+    node = nodes.new('GeometryNodeInputNamedAttribute')
+    node.data_type = 'FLOAT_VECTOR'
+    node.inputs["Name"].default_value = name
+    # outputs of other data types are unavailable
+    return node, next(output for output in node.outputs if output.enabled)
+
+
+def build_layout_node_group():
+    '''Node group instancing the source object on points with rotation and scale attributes'''
+    ng = bpy.data.node_groups.new(LAYOUT_GROUP_NAME, 'GeometryNodeTree')
+    ng[LAYOUT_GROUP_KEY] = LAYOUT_GROUP_VERSION
+    new_group_socket(ng, 'INPUT', 'NodeSocketGeometry', "Geometry")
+    new_group_socket(ng, 'INPUT', 'NodeSocketObject', "Source")
+    new_group_socket(ng, 'OUTPUT', 'NodeSocketGeometry', "Geometry")
+
+    nodes, links = ng.nodes, ng.links
+    group_in = nodes.new('NodeGroupInput')
+    group_out = nodes.new('NodeGroupOutput')
+
+    # instances are placed by their world matrices, so the source geometry is taken in its own space
+    source = nodes.new('GeometryNodeObjectInfo')
+    source.transform_space = 'ORIGINAL'
+    source.inputs["As Instance"].default_value = True
+    links.new(group_in.outputs["Source"], source.inputs["Object"])
+    rotation, rotation_output = new_attribute_node(nodes, "rotation")
+    scale, scale_output = new_attribute_node(nodes, "scale")
+
+    instance = nodes.new('GeometryNodeInstanceOnPoints')
+    links.new(group_in.outputs["Geometry"], instance.inputs["Points"])
+    links.new(source.outputs["Geometry"], instance.inputs["Instance"])
+    links.new(rotation_output, instance.inputs["Rotation"])
+    links.new(scale_output, instance.inputs["Scale"])
+    links.new(instance.outputs["Instances"], group_out.inputs[0])
+
+    for x, node in enumerate((group_in, instance, group_out)):
+        node.location = (x*300, 0)
+    for y, node in enumerate((source, rotation, scale)):
+        node.location = (0, -200 - y*200)
+    return ng
+
+
+def get_layout_node_group():
+    '''Radial layout node group of the current file, it's added if it doesn't exist'''
+    for ng in bpy.data.node_groups:
+        if ng.get(LAYOUT_GROUP_KEY) == LAYOUT_GROUP_VERSION and ng.bl_idname == 'GeometryNodeTree':
+            return ng
+    return build_layout_node_group()
+
+
+def new_layout_modifier(ob, source):
+    mod = ob.modifiers.new(name="Radial Layout", type='NODES')
+    mod.node_group = get_layout_node_group()
+    mod[get_input_identifiers(mod)["Source"]] = source
+    return mod
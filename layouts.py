@@ -0,0 +1,293 @@
+'''Export and import of radial layouts as compact transform buffers.
+
+A layout is a block of float32 world matrices of the source object and its radial duplicates
+with a JSON header naming the source object and the pattern parameters. Layouts are saved
+in the raw format below, or as .npy matrices with the header in a .json file next to them.
+
+Raw format, all numbers little-endian:
+
+    8 bytes      magic b"RADLAYT\\0"
+    4 bytes      uint32 header length H
+    H bytes      UTF-8 JSON header, padded with spaces so the matrix block starts at a multiple of 64
+    N*64 bytes   N row-major 4x4 float32 matrices, N is "count" of the header
+
+Matrices of both formats are memory mapped on import, so large layouts aren't read at once.
+Imported layouts are a mesh with a vertex per matrix, instancing the source object by geometry nodes.
+'''
+
+import bpy
+import json
+import os
+import struct
+from .functions import get_selected_objects, get_view_matrix
+from . import geometry_nodes
+from .profiling import timed_function
+from .radial_instances import get_pattern
+
+
+LAYOUT_MAGIC = b"RADLAYT\0"
+LAYOUT_VERSION = 1
+MATRIX_BLOCK_ALIGNMENT = 64
+LAYOUT_EXTENSIONS = (".rlay", ".npy")
+
+
+def get_pattern_layout(context, ob, linked_count, spin_axis, pattern=None):
+    '''(N, 4, 4) float32 world matrices of the object and its radial duplicates around the 3D cursor,
+    same as duplicate_radially makes without adding the objects'''
+    import numpy as np
+    from .radial_math import get_spin_vector, pattern_matrices
+    ob_mx = np.array(ob.matrix_world, dtype=np.float64)
+    view_mx = get_view_matrix(context) if spin_axis == 'VIEW_Z' else None
+    axis = get_spin_vector(ob_mx, spin_axis, view_mx)
+    mxs = pattern_matrices(context.scene.cursor.location, axis, linked_count, ob_mx, **(pattern or {}))
+    return np.concatenate((ob_mx[None], mxs)).astype(np.float32)
+
+
+def get_objects_layout(obs):
+    import numpy as np
+    return np.array([ob.matrix_world for ob in obs], dtype=np.float32).reshape(-1, 4, 4)
+
+
+def get_header_path(filepath):
+    return os.path.splitext(filepath)[0] + ".json"
+
+
+@timed_function("save_layout")
+def save_layout(filepath, matrices, header):
+    '''Save (N, 4, 4) matrices with the header dict, .npy files get the header in a .json file'''
+    import numpy as np
+    matrices = np.ascontiguousarray(matrices, dtype='<f4').reshape(-1, 4, 4)
+    header = dict(header, version=LAYOUT_VERSION, count=len(matrices))
+    if filepath.lower().endswith(".npy"):
+        np.save(filepath, matrices)
+        with open(get_header_path(filepath), "w") as f:
+            json.dump(header, f, indent=2)
+        return
+
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix_size = len(LAYOUT_MAGIC) + 4
+    header_bytes += b" "*(-(prefix_size + len(header_bytes)) % MATRIX_BLOCK_ALIGNMENT)
+    with open(filepath, "wb") as f:
+        f.write(LAYOUT_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        matrices.tofile(f)
+
+
+@timed_function("load_layout")
+def load_layout(filepath):
+    '''Header dict and read-only memory mapped (N, 4, 4) matrices of the layout file.
+    Raises ValueError if the file isn't a layout'''
+    import numpy as np
+    if filepath.lower().endswith(".npy"):
+        matrices = np.load(filepath, mmap_mode='r')
+        header_path = get_header_path(filepath)
+        header = {}
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                header = json.load(f)
+    else:
+        with open(filepath, "rb") as f:
+            if f.read(len(LAYOUT_MAGIC)) != LAYOUT_MAGIC:
+                raise ValueError("%s is not a radial layout file" % os.path.basename(filepath))
+            header_size, = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_size).decode("utf-8"))
+        offset = len(LAYOUT_MAGIC) + 4 + header_size
+        count = header["count"]
+        if count:
+            matrices = np.memmap(filepath, dtype='<f4', mode='r', offset=offset, shape=(count, 4, 4))
+        else:
+            # empty memory maps aren't allowed
+            matrices = np.zeros((0, 4, 4), dtype=np.float32)
+
+    if header.get("version", LAYOUT_VERSION) > LAYOUT_VERSION:
+        raise ValueError("layout version %s is newer than supported" % header["version"])
+    if matrices.ndim != 3 or matrices.shape[1:] != (4, 4):
+        raise ValueError("layout matrices have shape %s instead of (N, 4, 4)" % (matrices.shape,))
+    return header, matrices
+
+
+@timed_function("new_layout_object")
+def new_layout_object(context, name, matrices, source):
+    '''Object instancing the source object at every matrix. Vertices and their rotation and scale
+    attributes are set from arrays in bulk, instances are made by geometry nodes'''
+    from .radial_math import decompose_matrices
+    locations, rotations, scales = decompose_matrices(matrices)
+
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(len(locations))
+    me.vertices.foreach_set("co", locations.ravel())
+    for attribute_name, values in (("rotation", rotations), ("scale", scales)):
+        attribute = me.attributes.new(attribute_name, 'FLOAT_VECTOR', 'POINT')
+        attribute.data.foreach_set("vector", values.ravel())
+    me.update()
+
+    ob = bpy.data.objects.new(name, me)
+    context.collection.objects.link(ob)
+    geometry_nodes.new_layout_modifier(ob, source)
+    return ob
+
+
+class OBJECT_OT_export_radial_layout(bpy.types.Operator):
+    '''Save world matrices of a radial pattern of the active object or of selected objects to a layout file'''
+    bl_idname = "object.export_radial_layout"
+    bl_label = "Export Radial Layout"
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default="*.rlay;*.npy", options={'HIDDEN'})
+
+    source: bpy.props.EnumProperty(
+        name = "Source",
+        items = [('PATTERN', "Radial Pattern", "Matrices of duplicates of the active object around the 3D cursor, "
+                  "no objects have to be added"),
+             ('SELECTED', "Selected Objects", "Matrices of the active object followed by other selected objects")],
+        description = "Matrices to export",
+        default = 'PATTERN')
+
+    linked_count: bpy.props.IntProperty(
+        name = "Count",
+        default = 6,
+        min = 1,
+        description = "Total number of objects of every ring")
+
+    spin_axis: bpy.props.EnumProperty(
+        name = "Spin Axis",
+        items = [('LOCAL_X', "Local X", "Local X"),
+             ('LOCAL_Y', "Local Y", "Local Y"),
+             ('LOCAL_Z', "Local Z", "Local Z"),
+             ('VIEW_Z', "View Z", "View Z")],
+        description = "Rotation axis",
+        default = 'LOCAL_Z')
+
+    rings: bpy.props.IntProperty(
+        name = "Rings",
+        default = 1,
+        min = 1,
+        description = "Number of concentric rings")
+
+    ring_offset: bpy.props.FloatProperty(
+        name = "Ring Offset",
+        default = 1.0,
+        subtype = 'DISTANCE',
+        description = "Distance between rings, every next ring is moved away from the axis")
+
+    ring_count_step: bpy.props.IntProperty(
+        name = "Ring Count Step",
+        default = 0,
+        description = "Number of objects added to every next ring")
+
+    turns: bpy.props.FloatProperty(
+        name = "Turns",
+        default = 1.0,
+        min = 0.0,
+        description = "Number of full circles the objects of a ring are spread over")
+
+    step_height: bpy.props.FloatProperty(
+        name = "Step Height",
+        default = 0.0,
+        subtype = 'DISTANCE',
+        description = "Offset along the axis between neighbour objects, makes a helix")
+
+    step_twist: bpy.props.FloatProperty(
+        name = "Step Twist",
+        default = 0.0,
+        subtype = 'ANGLE',
+        description = "Rotation of every next object around its own origin")
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and context.object is not None
+
+    def execute(self, context):
+        ob = context.object
+        header = {
+            "source": ob.name,
+            "source_data": ob.data.name if ob.data is not None else None,
+            "includes_source": True,
+            "layout": self.source,
+        }
+        if self.source == 'PATTERN':
+            pattern = get_pattern(self)
+            matrices = get_pattern_layout(context, ob, self.linked_count, self.spin_axis, pattern)
+            header["parameters"] = dict(pattern, linked_count=self.linked_count, spin_axis=self.spin_axis,
+                                        center=list(context.scene.cursor.location))
+        else:
+            matrices = get_objects_layout(get_selected_objects(context, True))
+
+        filepath = self.filepath
+        if not filepath.lower().endswith(LAYOUT_EXTENSIONS):
+            filepath = bpy.path.ensure_ext(filepath, ".rlay")
+        save_layout(filepath, matrices, header)
+        self.report({'INFO'}, "Exported %d matrices" % len(matrices))
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        self.filepath = bpy.path.clean_name(context.object.name) + ".rlay"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+class OBJECT_OT_import_radial_layout(bpy.types.Operator):
+    '''Add an object instancing the source object of a layout file at every matrix of the layout'''
+    bl_idname = "object.import_radial_layout"
+    bl_label = "Import Radial Layout"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default="*.rlay;*.npy", options={'HIDDEN'})
+
+    include_source: bpy.props.BoolProperty(
+        name = "Include Source",
+        default = False,
+        description = "Also add an instance at the matrix of the source object, it's skipped if the source object is in the file")
+
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and geometry_nodes.is_layout_supported()
+
+    def execute(self, context):
+        try:
+            header, matrices = load_layout(self.filepath)
+        except (OSError, ValueError, KeyError) as e:
+            self.report({'ERROR'}, "Layout wasn't imported: %s" % e)
+            return {'CANCELLED'}
+
+        # source object of the file is used if it exists, otherwise the active object
+        source = bpy.data.objects.get(header.get("source", ""))
+        if source is None:
+            source = context.object
+        if source is None:
+            self.report({'ERROR'}, "Layout wasn't imported: source object %s not found" % header.get("source"))
+            return {'CANCELLED'}
+        if header.get("includes_source") and not self.include_source and source.name == header.get("source"):
+            matrices = matrices[1:]
+
+        ob = new_layout_object(context, source.name + " [Layout]", matrices, source)
+        for selected_ob in context.selected_objects:
+            selected_ob.select_set(False)
+        ob.select_set(True)
+        context.view_layer.objects.active = ob
+        self.report({'INFO'}, "Imported %d instances" % len(matrices))
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+classes = (
+    OBJECT_OT_export_radial_layout,
+    OBJECT_OT_import_radial_layout,
+)
+
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+
+
+def unregister():
+    from bpy.utils import unregister_class
+    for cls in reversed(classes):
+        unregister_class(cls)
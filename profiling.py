@@ -0,0 +1,295 @@
+import bpy
+import json
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+# upper bounds of histogram buckets in seconds, the last bucket collects the rest
+HISTOGRAM_BOUNDS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+MAX_SESSIONS = 20
+
+enabled = False
+sessions = []
+# modal session, depsgraph updates are only timed while it runs
+current_session = None
+# session of operator calls made outside of modal sessions
+operator_session = None
+profiler = None
+depsgraph_update_start = None
+registration_times = {}
+
+
+class StageTimings:
+    '''Durations of one stage: count, total, minimum, maximum and histogram'''
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.histogram = [0]*(len(HISTOGRAM_BOUNDS) + 1)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        bucket = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS) if duration <= bound), len(HISTOGRAM_BOUNDS))
+        self.histogram[bucket] += 1
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "histogram": dict(zip([str(bound) for bound in HISTOGRAM_BOUNDS] + ["inf"], self.histogram)),
+        }
+
+
+def get_bucket_labels():
+    '''Names of histogram buckets by their upper bounds'''
+    labels = ["<= %g ms" % (bound*1000) for bound in HISTOGRAM_BOUNDS]
+    labels.append("> %g ms" % (HISTOGRAM_BOUNDS[-1]*1000))
+    return labels
+
+
+class Session:
+    '''Stage timings recorded during one modal session or between operator calls'''
+
+    def __init__(self, name):
+        self.name = name
+        self.start_time = time.time()
+        self.end_time = None
+        self.stages = {}
+
+    def add(self, stage, duration):
+        timings = self.stages.get(stage)
+        if timings is None:
+            timings = self.stages[stage] = StageTimings()
+        timings.add(duration)
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "stages": {stage: timings.as_dict() for stage, timings in self.stages.items()},
+        }
+
+
+def add_session(name):
+    session = Session(name)
+    sessions.append(session)
+    del sessions[:-MAX_SESSIONS]
+    return session
+
+
+def record(stage, duration):
+    global operator_session
+    session = current_session
+    if session is None:
+        if operator_session not in sessions:
+            operator_session = add_session("Operators")
+        session = operator_session
+    session.add(stage, duration)
+
+
+@contextmanager
+def timed(stage):
+    '''Record duration of the block if timings are enabled'''
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def timed_function(stage):
+    '''Decorator recording duration of function calls if timings are enabled'''
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def start_session(context, name):
+    '''Start a modal session, run it under cProfile if it's enabled'''
+    global current_session, operator_session, profiler
+    if not enabled:
+        return
+    current_session = add_session(name)
+    # operator calls after the modal session are recorded in a new session
+    operator_session = None
+
+    settings = context.window_manager.radial_tools_profiling
+    if settings.use_cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+
+def get_output_path(context, name, ext):
+    '''Time stamped file path of the session output in the output directory'''
+    settings = context.window_manager.radial_tools_profiling
+    output_dir = bpy.path.abspath(settings.output_dir) or bpy.app.tempdir
+    file_name = "radial_tools_%s_%s%s" % (name.lower().replace(" ", "_"), time.strftime("%Y%m%d_%H%M%S"), ext)
+    return os.path.join(output_dir, file_name)
+
+
+def end_session(context):
+    global current_session, profiler
+    if current_session is None:
+        return
+    current_session.end_time = time.time()
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(get_output_path(context, current_session.name, ".pstats"))
+        profiler = None
+    current_session = None
+
+
+def report_registration(action, duration):
+    '''Store duration of add-on registration or unregistration, print it in debug mode'''
+    registration_times[action] = duration
+    if bpy.app.debug:
+        print("Radial Tools: %s took %.2f ms" % (action, duration*1000))
+
+
+def save_sessions(filepath):
+    with open(filepath, "w") as f:
+        json.dump({"registration": registration_times, "sessions": [session.as_dict() for session in sessions]}, f, indent=2)
+
+
+@bpy.app.handlers.persistent
+def depsgraph_update_pre(scene, depsgraph=None):
+    global depsgraph_update_start
+    if enabled:
+        depsgraph_update_start = time.perf_counter()
+
+
+@bpy.app.handlers.persistent
+def depsgraph_update_post(scene, depsgraph=None):
+    global depsgraph_update_start
+    if enabled and depsgraph_update_start is not None and current_session is not None:
+        record("depsgraph", time.perf_counter() - depsgraph_update_start)
+    depsgraph_update_start = None
+
+
+@bpy.app.handlers.persistent
+def load_post(*args):
+    # window manager settings are reset when a file is loaded with its UI
+    global enabled
+    enabled = bpy.context.window_manager.radial_tools_profiling.enabled
+
+
+def update_enabled(self, context):
+    global enabled
+    enabled = self.enabled
+
+
+class RadialToolsProfiling(bpy.types.PropertyGroup):
+    enabled: bpy.props.BoolProperty(
+        name = "Record Timings",
+        default = False,
+        description = "Record durations of radial tools stages",
+        update = update_enabled)
+
+    use_cprofile: bpy.props.BoolProperty(
+        name = "Profile Modal Sessions",
+        default = False,
+        description = "Run modal sessions under cProfile and save pstats files to the output directory")
+
+    output_dir: bpy.props.StringProperty(
+        name = "Output Directory",
+        default = "",
+        subtype = 'DIR_PATH',
+        description = "Directory of pstats files and event recordings, temporary directory if empty")
+
+    record_events: bpy.props.BoolProperty(
+        name = "Record Modal Events",
+        default = False,
+        description = "Save events of modal sessions to JSON files in the output directory, so they can be replayed")
+
+
+class RADTOOLS_OT_save_timings(bpy.types.Operator):
+    '''Save recorded timings of radial tools to a JSON file'''
+    bl_idname = "radtools.save_timings"
+    bl_label = "Save Timings"
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH')
+    filter_glob: bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return bool(sessions)
+
+    def execute(self, context):
+        save_sessions(bpy.path.ensure_ext(self.filepath, ".json"))
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        self.filepath = "radial_tools_timings.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+
+class RADTOOLS_OT_clear_timings(bpy.types.Operator):
+    '''Clear recorded timings of radial tools'''
+    bl_idname = "radtools.clear_timings"
+    bl_label = "Clear Timings"
+
+    def execute(self, context):
+        global current_session, operator_session
+        sessions.clear()
+        current_session = None
+        operator_session = None
+        return {'FINISHED'}
+
+
+classes = (
+    RadialToolsProfiling,
+    RADTOOLS_OT_save_timings,
+    RADTOOLS_OT_clear_timings,
+)
+
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+    bpy.types.WindowManager.radial_tools_profiling = bpy.props.PointerProperty(type=RadialToolsProfiling)
+    bpy.app.handlers.depsgraph_update_pre.append(depsgraph_update_pre)
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post)
+    bpy.app.handlers.load_post.append(load_post)
+
+
+def unregister():
+    global enabled
+    enabled = False
+    bpy.app.handlers.depsgraph_update_pre.remove(depsgraph_update_pre)
+    bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post)
+    bpy.app.handlers.load_post.remove(load_post)
+    del bpy.types.WindowManager.radial_tools_profiling
+    from bpy.utils import unregister_class
+    for cls in reversed(classes):
+        unregister_class(cls)
@@ -1,20 +1,60 @@
 import bpy
-from math import radians
+from math import tau
 from mathutils import Matrix, Vector
-from .functions import draw_text_line, draw_text, get_text_dimensions, get_safe_draw_x
+from .functions import OverlayLayout, get_selected_objects, get_view3d, get_view_matrix
+from . import geometry_nodes
+from .geometry_nodes import get_array_inputs, is_nodes_array, new_nodes_array, set_array_inputs
+from .registry import (forget_radial_array, get_indexed_objects, get_registered_arrays, get_settings_snapshot,
+    get_world_spin_vector, record_radial_array, restore_settings_snapshot, set_lod_visibility)
+from . import profiling
+from .profiling import timed, timed_function
+from .replay import end_recording, start_recording
 
 
+PREVIEW_VERTEX_LIMIT = 50000
+HELPER_USERS_KEY = "radial_array_users"
+# name of the viewport LOD modifier must not contain "Radial Array", so it's not picked up as a radial array
+LOD_MODIFIER_NAME = "Radial LOD"
+
+BACKEND_ITEMS = [
+    ('MODIFIER', "Array Modifier", "Array modifier with object offset by a helper empty"),
+    ('GEOMETRY_NODES', "Geometry Nodes", "Geometry nodes modifier without helper empty, requires Blender 3.1")]
+
+
+@timed_function("get_radial_array")
 def get_radial_array(ob):
     array = None
     for mod in reversed(ob.modifiers):
-        if mod.type == 'ARRAY' and "Radial Array" in mod.name:
+        if "Radial Array" in mod.name and (mod.type == 'ARRAY' or is_nodes_array(mod)):
             array = mod
             break
     return array
     
     
+def move_modifier(ob, mod, index):
+    '''Move the modifier to the index of the object modifier stack in one step.
+    Doesn't depend on the operator context, so it works from scripts, timers and background mode'''
+    mod_pos = ob.modifiers.find(mod.name)
+    if mod_pos == index:
+        return
+    
+    if hasattr(ob.modifiers, "move"):
+        ob.modifiers.move(mod_pos, index)
+        return
+    
+    override = {"object": ob, "active_object": ob}
+    if bpy.app.version >= (3, 2, 0):
+        with bpy.context.temp_override(**override):
+            bpy.ops.object.modifier_move_to_index(modifier=mod.name, index=index)
+    elif bpy.app.version >= (2, 90, 0):
+        bpy.ops.object.modifier_move_to_index(override, modifier=mod.name, index=index)
+    else:
+        for i in range(mod_pos - index):
+            bpy.ops.object.modifier_move_up(override, modifier=mod.name)
+    
+    
+@timed_function("sort_array")
 def sort_array(ob, array):
-    array_pos = ob.modifiers.find(array.name)
     others_ob_mods = list(reversed(ob.modifiers[:-1]))
     
     mirror = None
@@ -31,93 +71,436 @@ def sort_array(ob, array):
             another_array_pos = ob.modifiers.find(another_array.name)
             break
 
-    def move_mod_up(mod, iters):
-        for i in range(iters):
-            bpy.ops.object.modifier_move_up(modifier=mod.name)
-
     if another_array is not None:
-        iters = array_pos - another_array_pos - 1 # right after array
-        move_mod_up(array, iters)
+        move_modifier(ob, array, another_array_pos + 1) # right after array
     elif mirror is not None:
-        iters = array_pos - mirror_pos - 1 # right after mirror
-        move_mod_up(array, iters)
+        move_modifier(ob, array, mirror_pos + 1) # right after mirror
     else:
-        iters = array_pos 
-        move_mod_up(array, iters) # top
+        move_modifier(ob, array, 0) # top
+        
+
+def get_merge_threshold(context):
+    return 0.0001/context.scene.unit_settings.scale_length # .1mm
+
+
+def get_array_count(array):
+    if array.type == 'ARRAY':
+        return array.count
+    return get_array_inputs(array)["Segments"]
+
+
+def new_array_modifier(context, ob, merge_threshold=None, name="Radial Array"):
+    array = ob.modifiers.new(name=name, type='ARRAY')
+    array.use_object_offset = True
+    array.use_relative_offset = False
+    array.use_merge_vertices = True
+    array.use_merge_vertices_cap = True
+    array.merge_threshold = get_merge_threshold(context) if merge_threshold is None else merge_threshold
+    return array
+
+
+def get_local_axis_center(ob_mx, spin_vec, array_center):
+    '''Spin vector and array center in object space, geometry nodes arrays are evaluated in it'''
+    ob_mx_inv = ob_mx.inverted_safe()
+    axis = ob_mx_inv.to_3x3() @ Vector(spin_vec)
+    return axis.normalized(), ob_mx_inv @ Vector(array_center)
+
+
+def get_array_center(context, ob, center_on_cursor):
+    return (context.scene.cursor.location if center_on_cursor else ob.matrix_world.translation).copy()
+
+
+@timed_function("matrices")
+def get_helper_matrix(ob_mx, array_center, spin_vec, segments):
+    '''World matrix of the array helper - object matrix without scale rotated by one segment around the array center'''
+    from .radial_math import remove_scale, spin_matrices
+    helper_mx = spin_matrices(array_center, spin_vec, [tau/segments], remove_scale(ob_mx))[0]
+    return Matrix(helper_mx.tolist())
+
+
+def get_helper_users(empty):
+    return empty.get(HELPER_USERS_KEY, 1)
+
+
+def acquire_helper(empty):
+    empty[HELPER_USERS_KEY] = get_helper_users(empty) + 1
+
+
+def release_helper(empty):
+    '''Decrease the number of arrays using the helper, returns True if it isn't used anymore'''
+    users = get_helper_users(empty) - 1
+    empty[HELPER_USERS_KEY] = max(users, 0)
+    return users <= 0
+
+
+def get_helper_key(helper_mx):
+    return tuple(round(value, 5) for row in helper_mx for value in row)
+
+
+def get_shared_helpers(scene):
+    '''Helper empties of registered radial arrays by their rounded world matrix'''
+    shared_helpers = {}
+    for ob, array in get_registered_arrays(scene):
+        empty = getattr(array, "offset_object", None)
+        if empty is not None:
+            shared_helpers.setdefault(get_helper_key(empty.matrix_world), empty)
+    return shared_helpers
+
+
+def new_helper(context, ob, array, array_center):
+    from .geometry import get_cached_center
+    empty = bpy.data.objects.new(ob.name + " [Array Helper]", None)
+    empty.empty_display_type = 'SPHERE'
+    empty[HELPER_USERS_KEY] = 1
+
+    # Calculate empty radius - distance from the bounding box center of the mesh to the object origin
+    # Evaluated bounding box can include segments of an already evaluated radial array, so object data bounds are used.
+    # They are cached, so arrays of linked duplicates and repeated invokes don't read the mesh again
+    with timed("get_mesh_center"):
+        center = get_cached_center(ob)
+        empty.empty_display_size = (center - array_center).length*.75
+    
+    link_helper(context, ob, empty)
+    return empty
+
+
+def link_helper(context, ob, empty):
+    ob.users_collection[0].objects.link(empty)
+    view3d = get_view3d(context)
+    if view3d and view3d.local_view:
+        empty.local_view_set(view3d, True)
+
+
+def detach_helper(context, ob, array):
+    '''Give the array its own copy of the helper empty shared with other arrays, so it can be moved'''
+    empty = array.offset_object
+    release_helper(empty)
+    own_empty = empty.copy()
+    own_empty.name = ob.name + " [Array Helper]"
+    own_empty[HELPER_USERS_KEY] = 1
+    link_helper(context, ob, own_empty)
+    array.offset_object = own_empty
+    return own_empty
+
+
+def share_helper(array, shared_helpers):
+    '''Replace the helper empty of the array with an empty with the same transforms used by other arrays.
+    Returns the previous empty if it's not used anymore and should be removed'''
+    empty = array.offset_object
+    shared = shared_helpers.setdefault(get_helper_key(empty.matrix_world), empty)
+    if shared == empty:
+        return None
+    acquire_helper(shared)
+    array.offset_object = shared
+    return empty if release_helper(empty) else None
+
+
+def get_lod_modifier(ob):
+    settings = ob.radial_array
+    return ob.modifiers.get(settings.lod_modifier) if settings.lod_modifier else None
+
+
+def remove_lod(ob):
+    '''Remove the viewport LOD modifier of the radial array with its helper empty'''
+    settings = ob.radial_array
+    lod = get_lod_modifier(ob)
+    if lod is not None:
+        array = ob.modifiers.get(settings.modifier) if settings.modifier else None
+        if array is not None:
+            array.show_viewport = True
+        ob.modifiers.remove(lod)
+    if settings.lod_helper is not None:
+        bpy.data.objects.remove(settings.lod_helper, do_unlink=True)
+    settings.lod_modifier = ""
+    settings.lod_helper = None
+
+
+@timed_function("update_lod")
+def update_lod(context, ob, array):
+    '''Add, update or remove the viewport LOD of the registered radial array.
+    LOD is a copy of the array with viewport segments of the object settings, it's only drawn in the viewport.
+    Its helper empty is rotated by the viewport segment angle, so fewer segments still span the full circle'''
+    settings = ob.radial_array
+    lod = get_lod_modifier(ob)
+    segments = get_array_count(array)
+    if settings.viewport_segments < 1 or settings.viewport_segments >= segments or (array.type == 'ARRAY' and array.offset_object is None):
+        remove_lod(ob)
+        return
+    # LOD of converted array is replaced
+    if lod is not None and lod.type != array.type:
+        remove_lod(ob)
+        lod = None
+        
+    if lod is None:
+        if array.type == 'NODES':
+            lod = new_nodes_array(ob, LOD_MODIFIER_NAME)
+        else:
+            lod = new_array_modifier(context, ob, array.merge_threshold, LOD_MODIFIER_NAME)
+        lod.show_render = False
+        settings.lod_modifier = lod.name
+    lod_index, array_index = ob.modifiers.find(lod.name), ob.modifiers.find(array.name)
+    if lod_index != array_index + 1:
+        move_modifier(ob, lod, array_index + 1 if lod_index > array_index else array_index)
         
+    if array.type == 'NODES':
+        inputs = get_array_inputs(array)
+        inputs["Segments"] = settings.viewport_segments
+        set_array_inputs(ob, lod, inputs)
+    else:
+        if lod.count != settings.viewport_segments:
+            lod.count = settings.viewport_segments
+        for key in ("use_merge_vertices", "use_merge_vertices_cap", "merge_threshold"):
+            if getattr(lod, key) != getattr(array, key):
+                setattr(lod, key, getattr(array, key))
+        empty = settings.lod_helper
+        if empty is None:
+            empty = bpy.data.objects.new(ob.name + " [LOD Helper]", None)
+            empty.empty_display_type = 'SPHERE'
+            empty.empty_display_size = array.offset_object.empty_display_size
+            link_helper(context, ob, empty)
+            settings.lod_helper = empty
+        lod.offset_object = empty
+        array_center = settings.center if settings.center_on_cursor else ob.matrix_world.translation
+        helper_mx = get_helper_matrix(ob.matrix_world, array_center, get_world_spin_vector(ob), settings.viewport_segments)
+        if empty.matrix_world != helper_mx:
+            empty.matrix_world = helper_mx
+    set_lod_visibility(ob, context.scene.radial_array_use_lod)
 
-def add_radial_array(context, segments, spin_axis, force_new, center_on_cursor):
-    view3d = context.space_data
-    ob = context.object
+
+def add_radial_array(context, segments, spin_axis, force_new, center_on_cursor, ob=None, shared_helpers=None, backend='MODIFIER',
+                     viewport_segments=None, indexed_obs=None):
+    '''Add or edit the radial array of the object.
+    If shared_helpers dict of get_shared_helpers is given, the helper empty is shared with arrays with the same transforms.
+    If indexed_obs set of get_indexed_objects is given, the scene index isn't looked through for the object.
+    Backend of a new array is 'MODIFIER' or 'GEOMETRY_NODES', existing arrays keep their backend.
+    If viewport_segments is given, it's stored in the object settings and the viewport LOD is updated, 0 removes it'''
+    from .radial_math import get_spin_vector
+    ob = context.object if ob is None else ob
     ob_mx = ob.matrix_world
-    ob_loc = ob_mx.translation
-    cursor_loc = context.scene.cursor.location
     
-    array_center = cursor_loc if center_on_cursor else ob_loc
+    array_center = get_array_center(context, ob, center_on_cursor)
+    
+    # Get spin vector
+    view_mx = get_view_matrix(context) if spin_axis == 'VIEW_Z' else None
+    spin_vec = get_spin_vector(ob_mx, spin_axis, view_mx)
 
     # Adjust modifiers
     array = get_radial_array(ob)
     if array is None or force_new:
-        array = ob.modifiers.new(name="Radial Array", type='ARRAY')
-        array.use_object_offset = True
-        array.use_relative_offset = False
-        array.use_merge_vertices = True
-        array.use_merge_vertices_cap = True
-        array.merge_threshold = 0.0001/context.scene.unit_settings.scale_length # .1mm
+        # previous radial array is drawn again, its viewport LOD is taken over by the new one
+        set_lod_visibility(ob, False)
+        if backend == 'GEOMETRY_NODES' and geometry_nodes.is_supported():
+            array = new_nodes_array(ob)
+            set_array_inputs(ob, array, {"Merge Distance": get_merge_threshold(context)})
+        else:
+            array = new_array_modifier(context, ob)
 
         sort_array(ob, array)
+        
+    # Geometry nodes array only needs its inputs
+    if array.type == 'NODES':
+        axis, center = get_local_axis_center(ob_mx, spin_vec, array_center)
+        set_array_inputs(ob, array, {"Segments": segments, "Axis": axis, "Center": center})
+        record_radial_array(context.scene, ob, array, segments, spin_axis, spin_vec, center_on_cursor, array_center, indexed_obs)
+        if viewport_segments is not None:
+            ob.radial_array.viewport_segments = viewport_segments
+            update_lod(context, ob, array)
+        return None, array
 
-    array.count = segments
+    if array.count != segments:
+        array.count = segments
 
     # Get / add empty
     empty = array.offset_object
     if not empty:
-        empty = bpy.data.objects.new(ob.name + " [Array Helper]", None)
-        empty.empty_display_type = 'SPHERE'
-
-        # Calculate empty radius - distance from the bounding box center of the mesh to the object origin
-        def get_mesh_center(ob):
-            vcos = [ob.matrix_world @ v.co for v in ob.data.vertices]
-            find_center = lambda l: ( max(l) + min(l) ) / 2
-
-            x,y,z  = [[v[i] for v in vcos] for i in range(3)]
-            mesh_center = Vector(([find_center(axis) for axis in [x,y,z]]))
-            return mesh_center
-           
-        empty.empty_display_size = (get_mesh_center(ob) - array_center).length*.75
-        
-        ob.users_collection[0].objects.link(empty)
-        if view3d.local_view:
-            empty.local_view_set(view3d, True)
-        
+        empty = new_helper(context, ob, array, array_center)
         array.offset_object = empty
-    
-    # Get matrices and spin vector
-    if spin_axis == 'LOCAL_X':
-        spin_vec = (ob_mx[0][0], ob_mx[1][0], ob_mx[2][0])
-    elif spin_axis == 'LOCAL_Y':
-        spin_vec = (ob_mx[0][1], ob_mx[1][1], ob_mx[2][1])
-    elif spin_axis == 'LOCAL_Z':
-        spin_vec = (ob_mx[0][2], ob_mx[1][2], ob_mx[2][2])
-    elif spin_axis == 'VIEW_Z':
-        view_mx = view3d.region_3d.view_matrix
-        spin_vec = Vector((0,0,1)) @ view_mx
      
-    # Transform empty
-    empty.matrix_world = ob_mx
-    empty.scale = 1,1,1
-
-    spin_angle = 360/segments
-    spin_mx = (Matrix.Translation(array_center) @ Matrix.Rotation(radians(spin_angle), 4, spin_vec) @ Matrix.Translation(-array_center))
-    empty.matrix_world = spin_mx @ empty.matrix_world
+    # Transform empty, shared empty is moved only if it's not used by other arrays
+    helper_mx = get_helper_matrix(ob_mx, array_center, spin_vec, segments)
+    if empty.matrix_world != helper_mx:
+        if get_helper_users(empty) > 1:
+            empty = detach_helper(context, ob, array)
+        empty.matrix_world = helper_mx
+    
+    if shared_helpers is not None:
+        unused_empty = share_helper(array, shared_helpers)
+        if unused_empty is not None:
+            bpy.data.objects.remove(unused_empty, do_unlink=True)
+        empty = array.offset_object
     
+    record_radial_array(context.scene, ob, array, segments, spin_axis, spin_vec, center_on_cursor, array_center, indexed_obs)
+    if viewport_segments is not None:
+        ob.radial_array.viewport_segments = viewport_segments
+        update_lod(context, ob, array)
     return empty, array
 
 
+def get_apply_error(ob, array):
+    '''Reason why the radial array can't be applied by building the mesh directly, None if it can'''
+    from .geometry import get_uncopyable_attributes
+    if ob.type != 'MESH':
+        return "only meshes are supported"
+    if ob.data.shape_keys is not None:
+        return "meshes with shape keys are not supported"
+    if ob.vertex_groups:
+        return "meshes with vertex groups are not supported"
+    if ob.data.has_custom_normals:
+        return "meshes with custom normals are not supported"
+    uncopyable = get_uncopyable_attributes(ob.data)
+    if uncopyable:
+        return "attributes %s can't be copied" % ", ".join(uncopyable)
+    # geometry nodes arrays are converted to array modifiers before applying
+    if array.type == 'ARRAY' and array.offset_object is None:
+        return "array has no helper empty"
+    if array.type == 'ARRAY' and (array.fit_type != 'FIXED_COUNT' or array.use_relative_offset or array.use_constant_offset
+        or not array.use_object_offset or array.start_cap is not None or array.end_cap is not None):
+        return "array offset or caps were changed"
+    if any(mod.show_viewport for mod in ob.modifiers[:ob.modifiers.find(array.name)]):
+        return "radial array is not the first modifier"
+    return None
+
+
+def apply_radial_array(ob, array):
+    '''Replace the object mesh with the result of the radial array and remove the array with its helper empty.
+    Vertices are only welded on seams between neighbouring segments instead of merging the whole mesh'''
+    import numpy as np
+    from .radial_math import find_close_pairs, get_edge_map, get_weld_map, is_rigid, matrix_powers
+    from .geometry import copy_tiled_mesh_data, get_local_coords, mesh_from_arrays
+    me = ob.data
+    empty = array.offset_object
+    segments = array.count
+
+    # array modifier repeats offset of the helper empty relative to the object
+    offset_mx = np.array(ob.matrix_world.inverted_safe() @ empty.matrix_world)
+    segment_mxs = matrix_powers(offset_mx, segments).astype(np.float32)
+    coords = get_local_coords(ob)
+    vertex_count = len(coords)
+    segment_coords = np.einsum('kij,vj->kvi', segment_mxs[:, :3, :3], coords) + segment_mxs[:, None, :3, 3]
+
+    # every segment is welded to the previous one and the last segment is welded to the first one
+    pairs_a, pairs_b = [], []
+    if array.use_merge_vertices and segments > 1:
+        threshold = array.merge_threshold
+        seams = [(i, i + 1) for i in range(segments - 1)]
+        if array.use_merge_vertices_cap:
+            seams.append((segments - 1, 0))
+
+        # seams between neighbouring segments are the same if offset doesn't scale
+        same_seams = is_rigid(offset_mx)
+        if same_seams:
+            seam_a, seam_b = find_close_pairs(segment_coords[0], segment_coords[1], threshold)
+        for i, j in seams:
+            if not same_seams or j != i + 1:
+                seam_a, seam_b = find_close_pairs(segment_coords[i], segment_coords[j], threshold)
+            pairs_a.append(seam_a + i*vertex_count)
+            pairs_b.append(seam_b + j*vertex_count)
+    pairs_a = np.concatenate(pairs_a) if pairs_a else []
+    pairs_b = np.concatenate(pairs_b) if pairs_b else []
+    remap, kept = get_weld_map(segments*vertex_count, pairs_a, pairs_b)
+
+    loop_vertices = np.empty(len(me.loops), dtype=np.int32)
+    me.loops.foreach_get("vertex_index", loop_vertices)
+    loop_edges = np.empty(len(me.loops), dtype=np.int32)
+    me.loops.foreach_get("edge_index", loop_edges)
+    loop_starts = np.empty(len(me.polygons), dtype=np.int32)
+    me.polygons.foreach_get("loop_start", loop_starts)
+    edges = np.empty(len(me.edges)*2, dtype=np.int32)
+    me.edges.foreach_get("vertices", edges)
+    segment_indices = np.arange(segments)[:, None]
+
+    # edges are tiled like loops, so loose edges and edge data are kept, edges welded on seams are merged
+    tiled_edges = remap[(edges.reshape(1, -1, 2) + segment_indices[:, :, None]*vertex_count).reshape(-1, 2)]
+    kept_edges, edge_remap = get_edge_map(tiled_edges)
+
+    new_me = mesh_from_arrays(me.name,
+        segment_coords.reshape(-1, 3)[kept],
+        remap[(loop_vertices + segment_indices*vertex_count).ravel()],
+        (loop_starts + segment_indices*len(loop_vertices)).ravel(),
+        tiled_edges[kept_edges],
+        edge_remap[(loop_edges + segment_indices*len(me.edges)).ravel()])
+    copy_tiled_mesh_data(me, new_me, segments, kept, kept_edges)
+
+    ob.data = new_me
+    if ob.radial_array.modifier == array.name:
+        remove_lod(ob)
+        forget_radial_array(ob)
+    ob.modifiers.remove(array)
+    if release_helper(empty):
+        bpy.data.objects.remove(empty, do_unlink=True)
+    if me.users == 0:
+        name = me.name
+        bpy.data.meshes.remove(me)
+        new_me.name = name
+
+
+def guess_spin_axis(axis):
+    from .radial_math import AXIS_COLUMNS
+    for spin_axis, column in AXIS_COLUMNS.items():
+        if abs(axis[column]) > 1 - 1e-6:
+            return spin_axis
+    return 'VIEW_Z'
+
+
+def convert_radial_array(context, ob, array, backend):
+    '''Replace the radial array with an array of the other backend with the same object space offset.
+    Returns the new array modifier'''
+    import numpy as np
+    from .radial_math import get_rotation_axis_center, spin_matrices
+    if (array.type == 'NODES') == (backend == 'GEOMETRY_NODES'):
+        return array
+    
+    ob_mx = ob.matrix_world
+    name = array.name
+    index = ob.modifiers.find(name)
+    show_viewport, show_render = array.show_viewport, array.show_render
+    registered = ob.radial_array.modifier == name
+    
+    if array.type == 'ARRAY':
+        # array repeats offset of the helper empty relative to the object, that is a rotation around an object space axis
+        empty = array.offset_object
+        segments = array.count
+        offset_mx = ob_mx.inverted_safe() @ empty.matrix_world if empty is not None else Matrix()
+        axis, center = get_rotation_axis_center(offset_mx)
+        new_array = new_nodes_array(ob)
+        set_array_inputs(ob, new_array, {"Segments": segments, "Axis": axis, "Center": center,
+                                         "Merge Distance": array.merge_threshold})
+        ob.modifiers.remove(array)
+        if empty is not None and release_helper(empty):
+            bpy.data.objects.remove(empty, do_unlink=True)
+    else:
+        inputs = get_array_inputs(array)
+        segments = inputs["Segments"]
+        axis, center = np.array(inputs["Axis"]), np.array(inputs["Center"])
+        offset_mx = spin_matrices(center, axis, [tau/segments])[0]
+        new_array = new_array_modifier(context, ob, inputs["Merge Distance"])
+        new_array.count = segments
+        empty = new_helper(context, ob, new_array, ob_mx @ Vector(center))
+        empty.matrix_world = ob_mx @ Matrix(offset_mx.tolist())
+        new_array.offset_object = empty
+        ob.modifiers.remove(array)
+        
+    new_array.name = name
+    new_array.show_viewport, new_array.show_render = show_viewport, show_render
+    move_modifier(ob, new_array, index)
+    
+    if registered:
+        ob.radial_array.modifier = new_array.name
+        ob.radial_array.helper = getattr(new_array, "offset_object", None)
+        update_lod(context, ob, new_array)
+    else:
+        spin_vec = np.array(ob_mx.to_3x3() @ Vector(axis))
+        array_center = ob_mx @ Vector(center)
+        record_radial_array(context.scene, ob, new_array, segments, guess_spin_axis(axis), spin_vec,
+                            not np.allclose(center, 0), array_center)
+    return new_array
+
+
 class OBJECT_OT_radial_array(bpy.types.Operator):
     bl_description = ("LMB: Edit radial array or add a new one if it doesn't exist.\n"
     "+ Shift: Add a new radial array instead of trying to edit existing.\n"
-    "+ Ctrl: Set array center to the 3D cursor instead of object pivot")
+    "+ Ctrl: Set array center to the 3D cursor instead of object pivot.\n"
+    "+ Alt: Add radial arrays to all selected objects")
     bl_idname = "object.add_radial_array"
     bl_label = "Radial Array"
     bl_options = {'REGISTER', 'UNDO'}
@@ -147,101 +530,197 @@ class OBJECT_OT_radial_array(bpy.types.Operator):
         default = False,
         description = "Set the center of the radial array to the 3D cursor location")
         
+    use_selected: bpy.props.BoolProperty(
+        name = "Selected Objects",
+        default = False,
+        description = "Add radial arrays to all selected mesh and curve objects",
+        options={'SKIP_SAVE'} )
+        
+    share_helper: bpy.props.BoolProperty(
+        name = "Share Helper Empties",
+        default = False,
+        description = "Use one helper empty for all radial arrays with the same center, axis and segments")
+        
+    backend: bpy.props.EnumProperty(
+        name = "Backend",
+        items = BACKEND_ITEMS,
+        description = "Type of a new radial array, existing arrays keep their type",
+        default = 'MODIFIER')
+        
+    viewport_segments: bpy.props.IntProperty(
+        name = "Viewport Segments",
+        default = 0,
+        min = 0,
+        description = "Number of segments drawn in the viewport while scene viewport LOD is on, 0 to always draw all segments")
+        
     @classmethod
     def poll(cls, context):
         return (context.object is not None and context.area.type == 'VIEW_3D' and context.object.type in ('MESH', 'CURVE'))
 
     def execute(self, context):
-        add_radial_array(context, self.segments, self.spin_axis, self.force_new, self.center_on_cursor)
+        shared_helpers = get_shared_helpers(context.scene) if self.share_helper else None
+        indexed_obs = get_indexed_objects(context.scene)
+        for ob in get_selected_objects(context, self.use_selected, ('MESH', 'CURVE')):
+            add_radial_array(context, self.segments, self.spin_axis, self.force_new, self.center_on_cursor, ob, shared_helpers,
+                             self.backend, self.viewport_segments, indexed_obs)
         return {'FINISHED'}
         
     def invoke(self, context, event):
+        if event.alt:
+            self.use_selected = True
         self.execute(context)
         return {'FINISHED'}
 
 
-class OBJECT_OT_radial_array_modal(bpy.types.Operator):
-    bl_description = ("LMB: Edit radial array or add a new one if it doesn't exist.\n"
-    "+ Shift: Add a new radial array instead of trying to edit existing.\n"
-    "+ Ctrl: Set array center to the 3D cursor instead of object pivot")
-    bl_idname = "object.radial_array_modal"
-    bl_label = "Radial Array Modal"
-    bl_options = {'REGISTER', 'UNDO', 'BLOCKING'}
-    
-    segments: bpy.props.IntProperty(                        
-        name = "Segments",       
-        default = 6,
-        min = 1,
-        description = "Number of segments",
-        options={'SKIP_SAVE'} )
-        
-    spin_axis: bpy.props.EnumProperty(                        
-        name = "Spin Axis", 
-        items = [('LOCAL_X', "Local X", "Local X"),
-             ('LOCAL_Y', "Local Y", "Local Y"),
-             ('LOCAL_Z', "Local Z", "Local Z"),
-             ('VIEW_Z', "View Z", "View Z")],
-        description = "Spin axis",
-        default = 'LOCAL_Z')
-        
-    force_new: bpy.props.BoolProperty(                        
-        name = "Force New Modifier",       
-        default = False,
-        description = "Add a new radial array modifier instead of trying to pick up and edit existing")
-        
-    center_on_cursor: bpy.props.BoolProperty(                        
-        name = "Center on Cursor",       
-        default = False,
-        description = "Set the center of the radial array to the 3D cursor location")
+class RadialArrayModal:
+    '''Logic of the radial array modal, kept apart from the operator so recorded sessions can be replayed without the UI'''
     
-    @classmethod
-    def poll(cls, context):
-        return (context.object is not None and context.area.type == 'VIEW_3D' and context.object.type in ('MESH', 'CURVE'))
-        
     def __init__(self):
         self.type_count = 0
 
-    def get_init_array(self, context):
+    def get_init_array(self, ob):
         init_array = None
         init_array_count = None
         init_empty = None
         init_empty_mx = None
+        init_inputs = None
     
-        ob = context.object
         init_array = get_radial_array(ob)
         if init_array is not None:
-            init_array_count = init_array.count
-            init_empty = init_array.offset_object
+            init_array_count = get_array_count(init_array)
+            if init_array.type == 'NODES':
+                init_inputs = get_array_inputs(init_array)
+            else:
+                init_empty = init_array.offset_object
             if init_empty is not None:
                 init_empty_mx = init_empty.matrix_world.copy()
                 
-        return init_array, init_array_count, init_empty, init_empty_mx
+        return init_array, init_array_count, init_empty, init_empty_mx, init_inputs
         
     def invoke(self, context, event):
+        self.recorder = start_recording(context, self, event)
         self.force_new = event.shift 
         self.center_on_cursor = event.ctrl
+        self.use_selected = self.use_selected or event.alt
+        self.obs = get_selected_objects(context, self.use_selected, ('MESH', 'CURVE'))
 
+        # array parameters of every object before running modal, segments are picked up from the active one
+        self.init_arrays = [(None, None, None, None, None)]*len(self.obs)
         if not self.force_new:
-            self.init_array, self.init_array_count, self.init_empty, self.init_empty_mx = self.get_init_array(context)
-            if self.init_array is not None:
-                self.segments = self.init_array_count
+            self.init_arrays = [self.get_init_array(ob) for ob in self.obs]
+            init_array, init_array_count, init_empty, init_empty_mx, init_inputs = self.init_arrays[0]
+            if init_array is not None:
+                self.segments = init_array_count
 
-        self.empty, self.array = add_radial_array(context, self.segments, self.spin_axis, self.force_new, self.center_on_cursor)
+        self.init_settings = [get_settings_snapshot(ob) for ob in self.obs]
+        self.empties, self.arrays = [], []
+        indexed_obs = get_indexed_objects(context.scene)
+        for ob in self.obs:
+            empty, array = add_radial_array(context, self.segments, self.spin_axis, self.force_new, self.center_on_cursor, ob,
+                                            backend=self.backend, indexed_obs=indexed_obs)
+            self.empties.append(empty)
+            self.arrays.append(array)
+            # edited array is drawn instead of its viewport LOD until the tool is finished
+            set_lod_visibility(ob, False)
+        self.array_centers = [get_array_center(context, ob, self.center_on_cursor) for ob in self.obs]
+        self.start_preview(context)
+        self.update_spin_vecs(context)
+        self.update_pending = False
+        self.axis_changed = False
         
-        self.mouse_region_x = event.mouse_region_x
-        self.mouse_region_y = event.mouse_region_y
+        self.overlay = OverlayLayout(event.mouse_region_x, event.mouse_region_y)
         
-        context.window_manager.modal_handler_add(self)
-        context.area.header_text_set("Segments: %s   Spin Axis: %s" % (self.segments, self.spin_axis.title()))
-        context.workspace.status_text_set(text="LMB, ENTER: Confirm | RMB, ESC: Cancel | X: Local X | Y: Local Y | Z: Local Z | V: View Z | Del: Delete active array") 
-        self.handler = context.space_data.draw_handler_add(self.draw_ui, (context,), 'WINDOW', 'POST_PIXEL')
+        # replayed sessions run without a window
+        self.area = context.area
+        if self.area is not None:
+            self.timer = context.window_manager.event_timer_add(1/60, window=context.window)
+            context.window_manager.modal_handler_add(self)
+            self.area.header_text_set("Segments: %s   Spin Axis: %s" % (self.segments, self.spin_axis.title()))
+            context.workspace.status_text_set(text="LMB, ENTER: Confirm | RMB, ESC: Cancel | X: Local X | Y: Local Y | Z: Local Z | V: View Z | H: Share helper empties | Del: Delete active array") 
+            self.handler = context.space_data.draw_handler_add(self.draw_ui, (context,), 'WINDOW', 'POST_PIXEL')
+        profiling.start_session(context, "Radial Array")
         return {'RUNNING_MODAL'}
         
-    def update_array(self, context):
-        add_radial_array(context, self.segments, self.spin_axis, False, self.center_on_cursor)
-        context.area.header_text_set("Segments: %s   Spin Axis: %s" % (self.segments, self.spin_axis.title()))
+    def start_preview(self, context):
+        from .geometry import new_bounds_mesh, new_decimated_mesh
+        self.previews = []
+        for ob, array in zip(self.obs, self.arrays):
+            # geometry nodes arrays only change modifier inputs while the tool is running
+            if array.type == 'NODES':
+                continue
+            preview_mode = self.preview_mode
+            if preview_mode == 'AUTO':
+                preview_mode = 'DECIMATE' if ob.type == 'MESH' and len(ob.data.vertices) > PREVIEW_VERTEX_LIMIT else 'FULL'
+            if preview_mode == 'FULL':
+                continue
+                
+            # proxy mesh temporarily replaces object mesh
+            ob_data = ob.data
+            proxy = None
+            if ob.type == 'MESH' and preview_mode == 'DECIMATE':
+                proxy = new_decimated_mesh(ob, ob_data.name + " [Preview]", PREVIEW_VERTEX_LIMIT)
+            elif ob.type == 'MESH' and preview_mode == 'BOUNDS':
+                proxy = new_bounds_mesh(ob, ob_data.name + " [Preview]")
+            if proxy is not None:
+                ob.data = proxy
+                
+            self.previews.append((ob, ob_data, array, array.use_merge_vertices, proxy))
+            array.use_merge_vertices = False
+            
+    def end_preview(self, context):
+        # restore object data and array settings changed for preview
+        for ob, ob_data, array, use_merge_vertices, proxy in self.previews:
+            array.use_merge_vertices = use_merge_vertices
+            if proxy is not None:
+                ob.data = ob_data
+                bpy.data.meshes.remove(proxy)
+        self.previews = []
+        
+    def update_spin_vecs(self, context):
+        from .radial_math import get_spin_vector
+        view_mx = get_view_matrix(context) if self.spin_axis == 'VIEW_Z' else None
+        self.spin_vecs = [get_spin_vector(ob.matrix_world, self.spin_axis, view_mx) for ob in self.obs]
+        
+    def update_array(self, context, axis_changed=False):
+        # arrays are updated on the next timer event, so events received in one frame cause one update
+        self.update_pending = True
+        self.axis_changed = self.axis_changed or axis_changed
+        if self.area is not None:
+            self.area.header_text_set("Segments: %s   Spin Axis: %s" % (self.segments, self.spin_axis.title()))
+        
+    @timed_function("modal update")
+    def apply_update(self, context):
+        # view z axis follows the view like before the update was deferred
+        if self.axis_changed or self.spin_axis == 'VIEW_Z':
+            self.update_spin_vecs(context)
+            
+        for i, (ob, array, empty, array_center, spin_vec) in enumerate(zip(self.obs, self.arrays, self.empties, self.array_centers, self.spin_vecs)):
+            if array.type == 'NODES':
+                axis, center = get_local_axis_center(ob.matrix_world, spin_vec, array_center)
+                set_array_inputs(ob, array, {"Segments": self.segments, "Axis": axis})
+                continue
+            if array.count != self.segments:
+                array.count = self.segments
+            # helper empty shared with other arrays isn't moved
+            if get_helper_users(empty) > 1:
+                empty = self.empties[i] = detach_helper(context, ob, array)
+            empty.matrix_world = get_helper_matrix(ob.matrix_world, array_center, spin_vec, self.segments)
+            
+        self.update_pending = False
+        self.axis_changed = False
+    
+    def flush(self, context):
+        if self.update_pending:
+            self.apply_update(context)
     
     def modal(self, context, event):
+        if self.recorder is not None:
+            self.recorder.record(event)
+            
+        if event.type == 'TIMER':
+            self.flush(context)
+            return {'RUNNING_MODAL'}
+            
         if event.value == 'PRESS':
             if event.type == 'MIDDLEMOUSE':
                 return {'PASS_THROUGH'}
@@ -276,21 +755,27 @@ class OBJECT_OT_radial_array_modal(bpy.types.Operator):
                 
             elif event.type == 'X':
                 self.spin_axis = 'LOCAL_X'
-                self.update_array(context)
+                self.update_array(context, axis_changed=True)
                 
             elif event.type == 'Y':
                 self.spin_axis = 'LOCAL_Y'
-                self.update_array(context)
+                self.update_array(context, axis_changed=True)
         
             elif event.type == 'Z':
                 self.spin_axis = 'LOCAL_Z'
-                self.update_array(context)
+                self.update_array(context, axis_changed=True)
                 
             elif event.type == 'V':
                 self.spin_axis = 'VIEW_Z'
-                self.update_array(context)
+                self.update_array(context, axis_changed=True)
+                
+            elif event.type == 'H':
+                self.share_helper = not self.share_helper
+                if self.area is not None:
+                    self.area.tag_redraw()
                 
             elif event.type == 'DEL':
+                self.end_preview(context)
                 self.delete(context)
                 self.finish_modal(context)
                 return {'FINISHED'}
@@ -301,6 +786,11 @@ class OBJECT_OT_radial_array_modal(bpy.types.Operator):
                 return {'CANCELLED'}
                 
             elif event.type in ('SPACE', 'LEFTMOUSE'):
+                self.flush(context)
+                self.end_preview(context)
+                if self.share_helper:
+                    self.share_helpers(context)
+                self.record_arrays(context)
                 self.finish_modal(context)
                 return {'FINISHED'}
 
@@ -308,64 +798,327 @@ class OBJECT_OT_radial_array_modal(bpy.types.Operator):
 
 
     def finish_modal(self, context):
-        context.area.header_text_set(text=None)
-        context.workspace.status_text_set(text=None)
-        context.space_data.draw_handler_remove(self.handler, 'WINDOW')
-        context.region.tag_redraw()
+        profiling.end_session(context)
+        end_recording(context, self.recorder, "Radial Array")
+        if self.area is not None:
+            context.window_manager.event_timer_remove(self.timer)
+            self.area.header_text_set(text=None)
+            context.workspace.status_text_set(text=None)
+            context.space_data.draw_handler_remove(self.handler, 'WINDOW')
+            self.area.tag_redraw()
+        
+    def share_helpers(self, context):
+        shared_helpers = get_shared_helpers(context.scene)
+        unused_empties = set()
+        for array in self.arrays:
+            if array.type == 'NODES':
+                continue
+            unused_empty = share_helper(array, shared_helpers)
+            if unused_empty is not None:
+                unused_empties.add(unused_empty)
+        if unused_empties:
+            bpy.data.batch_remove(unused_empties)
+        
+    def record_arrays(self, context):
+        indexed_obs = get_indexed_objects(context.scene)
+        for ob, array, array_center, spin_vec in zip(self.obs, self.arrays, self.array_centers, self.spin_vecs):
+            record_radial_array(context.scene, ob, array, self.segments, self.spin_axis, spin_vec,
+                                self.center_on_cursor, array_center, indexed_obs)
+            update_lod(context, ob, array)
         
     def restore_init(self, context):
-        # restore array parameters or delete it if it didn't exist before running modal
-        if not self.force_new and self.init_array:
-            self.init_array.count = self.init_array_count
-            # restore empty transforms or delete it if it didn't exist before running modal
-        else:
-            context.object.modifiers.remove(self.array)
-            
-        if not self.force_new and self.init_empty :
-            self.init_empty.matrix_world = self.init_empty_mx
-        else:
-            bpy.data.objects.remove(self.empty, do_unlink=True)
+        self.end_preview(context)
+        new_empties = []
+        for ob, array, empty, init, init_settings in zip(self.obs, self.arrays, self.empties, self.init_arrays, self.init_settings):
+            init_array, init_array_count, init_empty, init_empty_mx, init_inputs = init
+            # restore array parameters or delete it if it didn't exist before running modal
+            restore_settings_snapshot(ob, init_settings)
+            if init_inputs is not None:
+                set_array_inputs(ob, init_array, init_inputs)
+            elif init_array:
+                init_array.count = init_array_count
+            else:
+                ob.modifiers.remove(array)
+            set_lod_visibility(ob, context.scene.radial_array_use_lod)
+                
+            # restore empty transforms or delete it if it didn't exist before running modal,
+            # shared empty detached from other arrays is given back to the array
+            if init_empty:
+                if empty != init_empty:
+                    acquire_helper(init_empty)
+                    array.offset_object = init_empty
+                    new_empties.append(empty)
+                init_empty.matrix_world = init_empty_mx
+            elif empty is not None:
+                new_empties.append(empty)
+        if new_empties:
+            bpy.data.batch_remove(new_empties)
             
     def delete(self, context):
-        context.object.modifiers.remove(self.array)
-        bpy.data.objects.remove(self.empty, do_unlink=True)
+        unused_empties = set()
+        for ob, array, empty in zip(self.obs, self.arrays, self.empties):
+            remove_lod(ob)
+            forget_radial_array(ob)
+            ob.modifiers.remove(array)
+            # shared empty is removed with its last array
+            if empty is not None and release_helper(empty):
+                unused_empties.add(empty)
+        if unused_empties:
+            bpy.data.batch_remove(unused_empties)
         
+    @timed_function("draw_ui")
     def draw_ui(self, context):
-        ui_scale = context.preferences.view.ui_scale
-    
         main_color = (1.0, 1.0, 1.0, 1.0)
         val_color = (*context.preferences.themes[0].view_3d.object_active, 1)
-        key_color = context.preferences.themes[0].view_3d.face_select
+        key_color = tuple(context.preferences.themes[0].view_3d.face_select)
         
-        ui_width, ui_height = 250, 50
-        ui_offset = 50*ui_scale
+        self.overlay.draw(context, (
+            (("Segments: ", main_color), 
+             ("(Scroll) ", key_color),
+             (str(self.segments), val_color)),
+            (("Spin Axis: ", main_color), 
+             ("(XYZV) ", key_color),
+             (str(self.spin_axis.title()), val_color)),
+            (("Share Helpers: ", main_color), 
+             ("(H) ", key_color),
+             ("On" if self.share_helper else "Off", val_color))))
+
+
+class OBJECT_OT_radial_array_modal(RadialArrayModal, bpy.types.Operator):
+    bl_description = ("LMB: Edit radial array or add a new one if it doesn't exist.\n"
+    "+ Shift: Add a new radial array instead of trying to edit existing.\n"
+    "+ Ctrl: Set array center to the 3D cursor instead of object pivot.\n"
+    "+ Alt: Edit radial arrays of all selected objects")
+    bl_idname = "object.radial_array_modal"
+    bl_label = "Radial Array Modal"
+    bl_options = {'REGISTER', 'UNDO', 'BLOCKING'}
     
-        font = 0
-        font_size = int(18*ui_scale)
-        align = "LEFT"
-        
-        safe_x, safe_y = get_safe_draw_x(context, ui_width + ui_offset), ui_height + ui_offset
-        mouse_offset_x = self.mouse_region_x + ui_offset
-        mouse_offset_y = self.mouse_region_y - ui_offset
-        newline_x = min(safe_x, mouse_offset_x)
-        newline_y = max(safe_y, mouse_offset_y)
-
-        newline_y = draw_text_line([
-            ("Segments: ", main_color), 
-            ("(Scroll) ", key_color),
-            (str(self.segments), val_color)],
-            newline_x, newline_y, align, font, font_size)
-
-        newline_y = draw_text_line([
-            ("Spin Axis: ", main_color), 
-            ("(XYZV) ", key_color),
-            (str(self.spin_axis.title()), val_color)],
-            newline_x, newline_y, align, font, font_size)
+    segments: bpy.props.IntProperty(                        
+        name = "Segments",       
+        default = 6,
+        min = 1,
+        description = "Number of segments",
+        options={'SKIP_SAVE'} )
+        
+    spin_axis: bpy.props.EnumProperty(                        
+        name = "Spin Axis", 
+        items = [('LOCAL_X', "Local X", "Local X"),
+             ('LOCAL_Y', "Local Y", "Local Y"),
+             ('LOCAL_Z', "Local Z", "Local Z"),
+             ('VIEW_Z', "View Z", "View Z")],
+        description = "Spin axis",
+        default = 'LOCAL_Z')
+        
+    force_new: bpy.props.BoolProperty(                        
+        name = "Force New Modifier",       
+        default = False,
+        description = "Add a new radial array modifier instead of trying to pick up and edit existing")
+        
+    center_on_cursor: bpy.props.BoolProperty(                        
+        name = "Center on Cursor",       
+        default = False,
+        description = "Set the center of the radial array to the 3D cursor location")
+        
+    use_selected: bpy.props.BoolProperty(
+        name = "Selected Objects",
+        default = False,
+        description = "Edit radial arrays of all selected mesh and curve objects",
+        options={'SKIP_SAVE'} )
+        
+    share_helper: bpy.props.BoolProperty(
+        name = "Share Helper Empties",
+        default = False,
+        description = "Use one helper empty for all radial arrays with the same center, axis and segments")
+        
+    backend: bpy.props.EnumProperty(
+        name = "Backend",
+        items = BACKEND_ITEMS,
+        description = "Type of a new radial array, existing arrays keep their type",
+        default = 'MODIFIER')
+        
+    preview_mode: bpy.props.EnumProperty(
+        name = "Preview",
+        items = [('AUTO', "Auto", "Use decimated proxy for meshes with many vertices"),
+             ('FULL', "Full", "Preview the final result"),
+             ('NO_MERGE', "No Merge", "Don't merge vertices of segments while the tool is running"),
+             ('DECIMATE', "Decimated Proxy", "Show decimated mesh without merging vertices of segments while the tool is running"),
+             ('BOUNDS', "Bounds Proxy", "Show bounding box of mesh without merging vertices of segments while the tool is running")],
+        description = "Low cost preview of the radial array while the tool is running. The final result is shown on confirm",
+        default = 'AUTO')
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.object is not None and context.area.type == 'VIEW_3D' and context.object.type in ('MESH', 'CURVE'))
+
+
+class OBJECT_OT_apply_radial_array(bpy.types.Operator):
+    '''Apply the radial array modifier and remove its helper empty.
+Final mesh is built directly and vertices are welded only on seams between segments'''
+    bl_idname = "object.apply_radial_array"
+    bl_label = "Apply Radial Array"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    use_selected: bpy.props.BoolProperty(
+        name = "Selected Objects",
+        default = False,
+        description = "Apply radial arrays of all selected objects",
+        options={'SKIP_SAVE'} )
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.mode == 'OBJECT' and context.object is not None and context.object.type == 'MESH' 
+                and get_radial_array(context.object) is not None)
+
+    def execute(self, context):
+        for ob in get_selected_objects(context, self.use_selected, ('MESH',)):
+            array = get_radial_array(ob)
+            if array is None:
+                continue
+            error = get_apply_error(ob, array)
+            if error is not None:
+                self.report({'WARNING'}, "Radial array of %s wasn't applied: %s" % (ob.name, error))
+                continue
+            if array.type == 'NODES':
+                array = convert_radial_array(context, ob, array, 'MODIFIER')
+            apply_radial_array(ob, array)
+        return {'FINISHED'}
+        
+    def invoke(self, context, event):
+        if event.alt:
+            self.use_selected = True
+        return self.execute(context)
             
             
+def refresh_radial_arrays(context, update_merge_threshold=True, center='KEEP', obs=None):
+    '''Update radial arrays of the scene registry in one pass.
+    Helper empties are moved back to the recorded array parameters and, if update_merge_threshold is True,
+    merge thresholds are set from the scene unit scale. Center is 'KEEP', 'ORIGIN' or 'CURSOR'.
+    Only changed values are written, so the depsgraph only updates modified objects'''
+    merge_threshold = get_merge_threshold(context) if update_merge_threshold else None
+    refreshed = 0
+    for ob, array in get_registered_arrays(context.scene):
+        if obs is not None and ob not in obs:
+            continue
+        refresh_radial_array(context, ob, array, merge_threshold, center)
+        refreshed += 1
+    return refreshed
+
+
+def refresh_radial_array(context, ob, array, merge_threshold=None, center='KEEP'):
+    '''Update one registered radial array like refresh_radial_arrays, merge threshold isn't changed if it's None'''
+    settings = ob.radial_array
+    if center != 'KEEP':
+        settings.center_on_cursor = center == 'CURSOR'
+        settings.center = context.scene.cursor.location
+    array_center = settings.center if settings.center_on_cursor else ob.matrix_world.translation
+    
+    # count could be edited in the modifier panel
+    segments = get_array_count(array)
+    settings.segments = segments
+    
+    if array.type == 'NODES':
+        axis, local_center = get_local_axis_center(ob.matrix_world, get_world_spin_vector(ob), array_center)
+        inputs = {"Axis": axis, "Center": local_center}
+        if merge_threshold is not None:
+            inputs["Merge Distance"] = merge_threshold
+        set_array_inputs(ob, array, inputs)
+        update_lod(context, ob, array)
+        return
+    
+    if merge_threshold is not None and array.merge_threshold != merge_threshold:
+        array.merge_threshold = merge_threshold
+    empty = array.offset_object
+    if empty is not None:
+        helper_mx = get_helper_matrix(ob.matrix_world, array_center, get_world_spin_vector(ob), segments)
+        if empty.matrix_world != helper_mx:
+            if get_helper_users(empty) > 1:
+                empty = detach_helper(context, ob, array)
+                settings.helper = empty
+            empty.matrix_world = helper_mx
+    update_lod(context, ob, array)
+
+
+class OBJECT_OT_refresh_radial_arrays(bpy.types.Operator):
+    '''Update all radial arrays of the scene at once.
+Helper empties follow their objects again and merge distances match the scene unit scale'''
+    bl_idname = "object.refresh_radial_arrays"
+    bl_label = "Refresh Radial Arrays"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    update_merge_threshold: bpy.props.BoolProperty(
+        name = "Update Merge Distance",
+        default = True,
+        description = "Set merge distance of arrays from the scene unit scale")
+        
+    center: bpy.props.EnumProperty(
+        name = "Center",
+        items = [('KEEP', "Keep", "Keep array centers, arrays centered on object origins follow their objects"),
+             ('ORIGIN', "Object Origin", "Center arrays on their object origins"),
+             ('CURSOR', "3D Cursor", "Center arrays on the 3D cursor location")],
+        description = "Array center",
+        default = 'KEEP')
+        
+    use_selected: bpy.props.BoolProperty(
+        name = "Only Selected",
+        default = False,
+        description = "Only refresh radial arrays of selected objects")
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.mode == 'OBJECT' and len(context.scene.radial_arrays) > 0)
+
+    def execute(self, context):
+        obs = set(context.selected_objects) if self.use_selected else None
+        refreshed = refresh_radial_arrays(context, self.update_merge_threshold, self.center, obs)
+        self.report({'INFO'}, "Refreshed %d radial arrays" % refreshed)
+        return {'FINISHED'}
+
+
+class OBJECT_OT_convert_radial_array(bpy.types.Operator):
+    '''Convert the radial array between the array modifier with a helper empty and geometry nodes'''
+    bl_idname = "object.convert_radial_array"
+    bl_label = "Convert Radial Array"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    backend: bpy.props.EnumProperty(
+        name = "Backend",
+        items = BACKEND_ITEMS,
+        description = "Type of the radial array after conversion",
+        default = 'GEOMETRY_NODES')
+        
+    use_selected: bpy.props.BoolProperty(
+        name = "Selected Objects",
+        default = False,
+        description = "Convert radial arrays of all selected objects",
+        options={'SKIP_SAVE'} )
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.mode == 'OBJECT' and context.object is not None and get_radial_array(context.object) is not None)
+
+    def execute(self, context):
+        if self.backend == 'GEOMETRY_NODES' and not geometry_nodes.is_supported():
+            self.report({'ERROR'}, "Geometry nodes radial arrays require Blender %d.%d" % geometry_nodes.MIN_BLENDER_VERSION[:2])
+            return {'CANCELLED'}
+            
+        for ob in get_selected_objects(context, self.use_selected):
+            array = get_radial_array(ob)
+            if array is not None:
+                convert_radial_array(context, ob, array, self.backend)
+        return {'FINISHED'}
+        
+    def invoke(self, context, event):
+        if event.alt:
+            self.use_selected = True
+        return self.execute(context)
+
+
 classes = (
     OBJECT_OT_radial_array,
-    OBJECT_OT_radial_array_modal
+    OBJECT_OT_radial_array_modal,
+    OBJECT_OT_apply_radial_array,
+    OBJECT_OT_refresh_radial_arrays,
+    OBJECT_OT_convert_radial_array
 )
 
 
@@ -1,44 +1,530 @@
 import bpy
-from math import radians
-from mathutils import Matrix, Vector
-from .functions import draw_text_line, draw_text, get_text_dimensions, get_safe_draw_x
+from mathutils import Matrix
+from mathutils.kdtree import KDTree
+from .functions import OverlayLayout, get_selected_objects, get_view3d, get_view_matrix
+from .radial_array import HELPER_USERS_KEY
+from . import profiling
+from .profiling import timed_function
+from .replay import end_recording, start_recording
 
 
-def duplicate_radially(context, linked_count, spin_axis):
-    ob = context.object
-    ob_mx = ob.matrix_world
+OUTPUT_MODE_ITEMS = [
+    ('OBJECTS', "Linked Objects", "Create linked duplicates of the object"),
+    ('COLLECTION', "Collection Instances", "Put the object into a collection and create instances of it. "
+        "Modifiers of the object are evaluated only once, but instances can't inherit its parent")]
+OUTPUT_MODE_NAMES = {identifier: name for identifier, name, description in OUTPUT_MODE_ITEMS}
+PATTERN_PROPERTIES = ("rings", "ring_offset", "ring_count_step", "turns", "step_height", "step_twist")
+# larger numbers of new duplicates are created in chunks from a timer by the modal operator
+CHUNK_THRESHOLD = 500
+CHUNK_SIZE = 250
+# objects closer than this in every matrix element are stacked
+STACK_TOLERANCE = 1e-4
+# modifier properties that don't change the result, they are ignored when modifier stacks are compared
+UI_PROPERTIES = {"name", "show_expanded", "is_active", "is_override_data_editable", "use_pin_to_last"}
+
+
+@timed_function("matrices")
+def get_radial_matrices(context, ob_mx, linked_count, spin_axis, pattern=None):
+    '''World matrices of the duplicates, not including the source object.
+    Pattern is a dict of ring and helix keyword arguments of pattern_matrices'''
+    from .radial_math import get_spin_vector, pattern_matrices
     cursor_loc = context.scene.cursor.location
-    view3d = context.space_data
-    dupli_obs = []
-    
-    if linked_count > 0:
-        if spin_axis == 'LOCAL_X':
-            rot_vec = (ob_mx[0][0], ob_mx[1][0], ob_mx[2][0])
-        elif spin_axis == 'LOCAL_Y':
-            rot_vec = (ob_mx[0][1], ob_mx[1][1], ob_mx[2][1])
-        elif spin_axis == 'LOCAL_Z':
-            rot_vec = (ob_mx[0][2], ob_mx[1][2], ob_mx[2][2])
-        elif spin_axis == 'VIEW_Z':
-            view_mx = view3d.region_3d.view_matrix
-            rot_vec = Vector((0,0,1)) @ view_mx
-            
-        rot_angle = 360/linked_count
-        for i in range(linked_count - 1):
+    view_mx = get_view_matrix(context) if spin_axis == 'VIEW_Z' else None
+
+    rot_vec = get_spin_vector(ob_mx, spin_axis, view_mx)
+    matrices = pattern_matrices(cursor_loc, rot_vec, linked_count, ob_mx, **(pattern or {}))
+    return [Matrix(mx) for mx in matrices.tolist()]
+
+
+def is_source_collection(coll):
+    return coll is not None and coll.get("radial_source", False)
+
+
+def is_unit_collection(coll):
+    '''Source collection of a hierarchy duplicated as one unit, it isn't reused for instances of single objects'''
+    return is_source_collection(coll) and coll.get("radial_unit", False)
+
+
+def get_target_collection(ob):
+    '''Collection to link duplicates of the object to, skipping radial source collections'''
+    for coll in ob.users_collection:
+        if not is_source_collection(coll):
+            return coll
+    return ob.users_collection[0]
+
+
+def get_source_collection(ob):
+    '''Collection with the object which is used for collection instances of it.
+    It isn't linked to the scene, so the object is only drawn from its own collection'''
+    for coll in ob.users_collection:
+        if is_source_collection(coll) and not is_unit_collection(coll):
+            return coll
+
+    coll = bpy.data.collections.new(ob.name + " [Radial Source]")
+    coll["radial_source"] = True
+    coll.objects.link(ob)
+    return coll
+
+
+def get_placement(ob):
+    '''Data of the geometry the object shows and the world matrix of the geometry, None for objects without geometry.
+    Radial collection instances show their source object'''
+    coll = ob.instance_collection if ob.instance_type == 'COLLECTION' else None
+    if is_source_collection(coll):
+        if len(coll.objects) != 1 or coll.objects[0].data is None:
+            return None
+        source = coll.objects[0]
+        return source.data, ob.matrix_world @ Matrix.Translation(-coll.instance_offset) @ source.matrix_world
+    if ob.data is None:
+        return None
+    return ob.data, ob.matrix_world
+
+
+def matrices_match(mx_a, mx_b, tolerance):
+    return all(abs(a - b) <= tolerance for row_a, row_b in zip(mx_a, mx_b) for a, b in zip(row_a, row_b))
+
+
+class PlacementIndex:
+    '''Objects with their geometry data and world matrix, looked up by location in a KD-tree'''
+
+    @timed_function("placement index")
+    def __init__(self, obs, tolerance=STACK_TOLERANCE):
+        self.tolerance = tolerance
+        self.entries = []
+        for ob in obs:
+            placement = get_placement(ob)
+            if placement is not None:
+                self.entries.append((ob, placement[0], placement[1].copy()))
+
+        self.tree = KDTree(len(self.entries))
+        for i, (ob, data, mx) in enumerate(self.entries):
+            self.tree.insert(mx.translation, i)
+        self.tree.balance()
+
+    def find(self, data, matrix):
+        '''Objects showing the data with the same world matrix, only objects near the matrix location are compared'''
+        obs = []
+        for co, i, dist in self.tree.find_range(matrix.translation, self.tolerance):
+            ob, ob_data, ob_mx = self.entries[i]
+            if ob_data == data and matrices_match(ob_mx, matrix, self.tolerance):
+                obs.append(ob)
+        return obs
+
+
+class DuplicatePool:
+    '''Linked duplicates of an object that are kept between modal updates.
+    Spare duplicates are hidden instead of deleted and removed in one batch on trim or clear.
+    If the placement index is set, duplicates aren't created where the object is already shown'''
+
+    def __init__(self, context, ob, output_mode='OBJECTS', index=None):
+        self.ob = ob
+        self.ob_mx = ob.matrix_world.copy()
+        self.view3d = get_view3d(context)
+        self.output_mode = output_mode
+        self.target_collection = get_target_collection(ob)
+        self.source_collection = None
+        self.obs = []
+        self.active_count = 0
+        self.index = index
+
+    @property
+    def active_obs(self):
+        return self.obs[:self.active_count]
+
+    def new_duplicate(self):
+        ob = self.ob
+        if self.output_mode == 'COLLECTION':
+            if self.source_collection is None:
+                self.source_collection = get_source_collection(ob)
+            dupli_ob = bpy.data.objects.new(ob.name, None)
+            dupli_ob.instance_type = 'COLLECTION'
+            dupli_ob.instance_collection = self.source_collection
+        else:
             dupli_ob = ob.copy()
-            ob.users_collection[0].objects.link(dupli_ob)
-            dupli_obs.append(dupli_ob)
-            
-            if ob.parent:
-                dupli_ob.parent = ob.parent
-                dupli_ob.matrix_parent_inverse = ob.matrix_parent_inverse
-            
-            rot_mx = (Matrix.Translation(cursor_loc) @ Matrix.Rotation(radians(rot_angle*(i+1)), 4, rot_vec) @ Matrix.Translation(-cursor_loc))
-            dupli_ob.matrix_world = rot_mx @ dupli_ob.matrix_world
-            
-            if view3d.local_view:
-                dupli_ob.local_view_set(view3d, True)
-                
-    return dupli_obs
+        # unlike hierarchy copies, duplicates aren't gathered in a new collection linked once: they stay next to
+        # the source object, and the modal tool grows the pool over many updates and timer chunks,
+        # so a collection per batch would leave several collections behind every run
+        self.target_collection.objects.link(dupli_ob)
+
+        # instances get the source object transforms on top of their own, so they can't share its parent
+        if ob.parent and self.output_mode == 'OBJECTS':
+            dupli_ob.parent = ob.parent
+            dupli_ob.matrix_parent_inverse = ob.matrix_parent_inverse
+
+        if self.view3d and self.view3d.local_view:
+            dupli_ob.local_view_set(self.view3d, True)
+
+        return dupli_ob
+
+    def get_free_matrices(self, matrices):
+        '''Matrices without other objects showing the object geometry at them, duplicates of the pool don't count'''
+        placement = get_placement(self.ob)
+        if self.index is None or placement is None:
+            return matrices
+        data, placement_mx = placement
+        offset = self.ob_mx.inverted_safe() @ placement_mx
+        own_obs = set(self.obs)
+        return [mx for mx in matrices if all(ob in own_obs for ob in self.index.find(data, mx @ offset))]
+
+    def grow(self, count, limit):
+        '''Add up to limit hidden spare duplicates until the pool has count of them, returns number of added ones'''
+        added = 0
+        while len(self.obs) < count and added < limit:
+            dupli_ob = self.new_duplicate()
+            dupli_ob.hide_viewport = True
+            dupli_ob.hide_render = True
+            self.obs.append(dupli_ob)
+            added += 1
+        return added
+
+    def resize(self, count):
+        while len(self.obs) < count:
+            self.obs.append(self.new_duplicate())
+
+        # only touch duplicates which visibility has changed
+        for i in range(min(count, self.active_count), max(count, self.active_count)):
+            hide = i >= count
+            self.obs[i].hide_viewport = hide
+            self.obs[i].hide_render = hide
+        self.active_count = count
+
+    def transform(self, matrices):
+        if self.output_mode == 'COLLECTION':
+            ob_mx_inv = self.ob_mx.inverted_safe()
+            matrices = [mx @ ob_mx_inv for mx in matrices]
+
+        for dupli_ob, mx in zip(self.obs, matrices):
+            dupli_ob.matrix_world = mx
+
+    def trim(self):
+        '''Remove hidden spare duplicates'''
+        spare_obs = self.obs[self.active_count:]
+        if spare_obs:
+            bpy.data.batch_remove(spare_obs)
+        del self.obs[self.active_count:]
+
+        if not self.obs:
+            remove_unused_source_collection(self.source_collection)
+            self.source_collection = None
+
+    def clear(self):
+        if self.obs:
+            bpy.data.batch_remove(self.obs)
+        self.obs = []
+        self.active_count = 0
+
+        remove_unused_source_collection(self.source_collection)
+        self.source_collection = None
+
+
+def remove_unused_source_collection(coll):
+    # instancers are the only users of a source collection
+    if coll is not None and coll.users == 0:
+        bpy.data.collections.remove(coll)
+
+
+class DuplicateJob:
+    '''Growth of duplicate pools split into chunks run from a timer, so the interface stays responsive.
+    Duplicates are shown and transformed when all of them are created'''
+
+    def __init__(self, pools, matrices, on_update):
+        self.pools_matrices = list(zip(pools, matrices))
+        self.total = sum(max(len(mxs) - len(pool.obs), 0) for pool, mxs in self.pools_matrices)
+        self.created = 0
+        self.finished = False
+        self.on_update = on_update
+        # the same function object is needed to unregister the timer
+        self.timer_function = self.step
+        bpy.app.timers.register(self.timer_function, first_interval=0.0)
+
+    @property
+    def progress(self):
+        return self.created / self.total if self.total else 1.0
+
+    @timed_function("duplicate chunk")
+    def step(self):
+        # a timer call can still be queued after the job is run to the end or cancelled
+        if self.finished:
+            return None
+        limit = CHUNK_SIZE
+        for pool, matrices in self.pools_matrices:
+            added = pool.grow(len(matrices), limit)
+            self.created += added
+            limit -= added
+            if limit <= 0:
+                break
+        else:
+            for pool, matrices in self.pools_matrices:
+                pool.resize(len(matrices))
+                pool.transform(matrices)
+            self.finished = True
+
+        self.on_update(self)
+        return None if self.finished else 0.01
+
+    def unregister_timer(self):
+        if bpy.app.timers.is_registered(self.timer_function):
+            bpy.app.timers.unregister(self.timer_function)
+
+    def run(self):
+        '''Create all remaining duplicates at once without the timer'''
+        self.unregister_timer()
+        while not self.finished:
+            self.step()
+
+    def cancel(self):
+        self.unregister_timer()
+        self.finished = True
+
+
+@timed_function("duplicate_radially")
+def duplicate_radially(context, linked_count, spin_axis, pool=None, output_mode='OBJECTS', ob=None, pattern=None,
+                       skip_existing=False, index=None):
+    '''Add duplicates of the object around the 3D cursor or update duplicates of the pool.
+    If skip_existing is True, duplicates aren't added where an object with the same data and transforms exists.
+    Pass the placement index of the scene when duplicating many objects, so it isn't built for every one'''
+    if pool is None:
+        pool = DuplicatePool(context, context.object if ob is None else ob, output_mode, index)
+    if skip_existing and pool.index is None:
+        pool.index = PlacementIndex(context.scene.objects)
+
+    matrices = get_radial_matrices(context, pool.ob_mx, linked_count, spin_axis, pattern)
+    if skip_existing:
+        matrices = pool.get_free_matrices(matrices)
+    pool.resize(len(matrices))
+    pool.transform(matrices)
+
+    return pool.active_obs
+
+
+def get_pattern(op):
+    return {key: getattr(op, key) for key in PATTERN_PROPERTIES}
+
+
+def get_object_pointers(ob):
+    '''(owner, property name, object) of objects referenced by constraints, modifiers and radial array settings of the object'''
+    pointers = []
+    for item in (*ob.constraints, *ob.modifiers, ob.radial_array):
+        for prop in item.bl_rna.properties:
+            if prop.type == 'POINTER' and not prop.is_readonly and prop.fixed_type.identifier == 'Object':
+                target = getattr(item, prop.identifier)
+                if target is not None:
+                    pointers.append((item, prop.identifier, target))
+    return pointers
+
+
+def get_pointer_users(obs):
+    '''Dict of sets of objects referencing each object by constraints, modifiers and radial array settings'''
+    users = {}
+    for ob in obs:
+        for item, identifier, target in get_object_pointers(ob):
+            users.setdefault(target, set()).add(ob)
+    return users
+
+
+def get_hierarchy(obs):
+    '''Objects with all their children and private helpers of them, like array offset empties and constraint targets
+    that nothing else uses, so the helpers are duplicated with the objects using them.
+    Shared targets like cameras and rigs, parents of the objects and helpers with a hierarchy of their own are left out,
+    copies keep pointing to the originals'''
+    hierarchy = []
+    found = set()
+    queue = list(obs)
+    while queue:
+        ob = queue.pop()
+        if ob not in found:
+            found.add(ob)
+            hierarchy.append(ob)
+            queue.extend(ob.children)
+
+    ancestors = set()
+    for ob in obs:
+        parent = ob.parent
+        while parent is not None:
+            ancestors.add(parent)
+            parent = parent.parent
+
+    # helpers are added one by one, so helpers of helpers are found too, their children aren't expanded
+    pointer_users = get_pointer_users(bpy.data.objects)
+    queue = list(hierarchy)
+    while queue:
+        ob = queue.pop()
+        for item, identifier, target in get_object_pointers(ob):
+            if (target in found or target in ancestors or target.children
+                    or (target.parent is not None and target.parent not in found)
+                    or not pointer_users[target] <= found):
+                continue
+            found.add(target)
+            hierarchy.append(target)
+            queue.append(target)
+    return hierarchy
+
+
+def remap_object_pointers(ob, mapping):
+    '''Point object properties of constraints, modifiers and radial array settings of the object to objects of the mapping'''
+    for item, identifier, target in get_object_pointers(ob):
+        if target in mapping:
+            setattr(item, identifier, mapping[target])
+
+
+def copy_unit(unit):
+    '''Dict of linked duplicates of the objects by the objects, parents and object pointers inside the unit are remapped
+    to the duplicates. Duplicates aren't linked to any collection'''
+    mapping = {ob: ob.copy() for ob in unit}
+    for ob, copy_ob in mapping.items():
+        if ob.parent in mapping:
+            # parent inverse matrix is copied, so the child keeps its place relative to the parent
+            copy_ob.parent = mapping[ob.parent]
+        remap_object_pointers(copy_ob, mapping)
+
+    # helper empties shared by radial arrays count their users, copies are only used inside the unit
+    for copy_ob in mapping.values():
+        if HELPER_USERS_KEY in copy_ob:
+            copy_ob[HELPER_USERS_KEY] = max(sum(mod.type == 'ARRAY' and mod.offset_object == copy_ob
+                                                for other in mapping.values() for mod in other.modifiers), 1)
+    return mapping
+
+
+@timed_function("matrices")
+def get_unit_transforms(context, pivot_mx, linked_count, spin_axis, pattern=None):
+    '''(N, 4, 4) world space transforms moving the pivot object to its radial duplicates'''
+    import numpy as np
+    from .radial_math import get_spin_vector, pattern_matrices
+    pivot_mx = np.array(pivot_mx, dtype=np.float64)
+    view_mx = get_view_matrix(context) if spin_axis == 'VIEW_Z' else None
+    axis = get_spin_vector(pivot_mx, spin_axis, view_mx)
+    matrices = pattern_matrices(context.scene.cursor.location, axis, linked_count, pivot_mx, **(pattern or {}))
+    return matrices @ np.linalg.inv(pivot_mx)
+
+
+@timed_function("duplicate_hierarchy_radially")
+def duplicate_hierarchy_radially(context, linked_count, spin_axis, obs, output_mode='OBJECTS', pattern=None):
+    '''Duplicate the objects with their children and private helpers around the 3D cursor as one unit,
+    the first object is the pivot. Parents, constraint and modifier targets inside the unit point to objects of the same copy,
+    shared targets outside the unit point to the originals.
+    Copies are put into a new collection, which is linked to the scene once all of them are created.
+    Returns the list of new objects'''
+    import numpy as np
+    pivot = obs[0]
+    unit = get_hierarchy(obs)
+    transforms = get_unit_transforms(context, pivot.matrix_world, linked_count, spin_axis, pattern)
+    view3d = get_view3d(context)
+    batch_collection = bpy.data.collections.new(pivot.name + " [Radial Copies]")
+
+    new_obs = []
+    if output_mode == 'COLLECTION':
+        # the unit is instanced as a whole, instance transforms apply on top of world matrices of its objects.
+        # It gets its own source collection, so instances of single objects don't start showing the whole unit
+        source_collection = bpy.data.collections.new(pivot.name + " [Radial Unit]")
+        source_collection["radial_source"] = True
+        source_collection["radial_unit"] = True
+        for ob in unit:
+            source_collection.objects.link(ob)
+        for mx in transforms.tolist():
+            instance_ob = bpy.data.objects.new(pivot.name, None)
+            instance_ob.instance_type = 'COLLECTION'
+            instance_ob.instance_collection = source_collection
+            instance_ob.matrix_world = Matrix(mx)
+            batch_collection.objects.link(instance_ob)
+            new_obs.append(instance_ob)
+    else:
+        # only roots are moved, children follow their copied parents
+        unit_set = set(unit)
+        roots = [ob for ob in unit if ob.parent not in unit_set]
+        root_mxs = np.array([ob.matrix_world for ob in roots], dtype=np.float64)
+        copy_mxs = transforms[:, None] @ root_mxs[None]
+        for root_copy_mxs in copy_mxs.tolist():
+            mapping = copy_unit(unit)
+            for copy_ob in mapping.values():
+                batch_collection.objects.link(copy_ob)
+            for root, mx in zip(roots, root_copy_mxs):
+                mapping[root].matrix_world = Matrix(mx)
+            new_obs += mapping.values()
+
+    get_target_collection(pivot).children.link(batch_collection)
+    if view3d and view3d.local_view:
+        for ob in new_obs:
+            ob.local_view_set(view3d, True)
+    return new_obs
+
+
+def get_property_values(item):
+    '''Values of the editable properties of a modifier that change its result, arrays are converted to tuples'''
+    values = []
+    for prop in item.bl_rna.properties:
+        if prop.is_readonly or prop.type == 'COLLECTION' or prop.identifier in UI_PROPERTIES:
+            continue
+        value = getattr(item, prop.identifier)
+        if prop.type in {'BOOLEAN', 'INT', 'FLOAT'} and prop.is_array:
+            value = tuple(value)
+        values.append(value)
+    return values
+
+
+def get_appearance(ob):
+    '''Modifier stack and material slots of the object, radial collection instances show their source object'''
+    coll = ob.instance_collection if ob.instance_type == 'COLLECTION' else None
+    if is_source_collection(coll) and len(coll.objects) == 1:
+        ob = coll.objects[0]
+    return ([get_property_values(mod) for mod in ob.modifiers],
+            [(slot.link, slot.material) for slot in ob.material_slots])
+
+
+def find_stacks(obs, tolerance=STACK_TOLERANCE):
+    '''Lists of objects showing the same data with the same world matrix, modifier stack and material slots'''
+    index = PlacementIndex(obs, tolerance)
+    appearances = {}
+    stacked = set()
+    stacks = []
+    for ob, data, mx in index.entries:
+        if ob in stacked:
+            continue
+        stack = [stack_ob for stack_ob in index.find(data, mx) if stack_ob not in stacked]
+        if len(stack) > 1:
+            # appearance is compared only for objects at the same place
+            for stack_ob in stack:
+                if stack_ob not in appearances:
+                    appearances[stack_ob] = get_appearance(stack_ob)
+            stack = [stack_ob for stack_ob in stack if appearances[stack_ob] == appearances[ob]]
+        if len(stack) > 1:
+            stacked.update(stack)
+            stacks.append(stack)
+    return stacks
+
+
+def get_protected_objects():
+    '''Objects that stacks never lose: targets of constraints, modifiers and radial arrays and objects
+    of radial source collections, which instances show'''
+    protected = set(get_pointer_users(bpy.data.objects))
+    for coll in bpy.data.collections:
+        if is_source_collection(coll):
+            protected.update(coll.objects)
+    return protected
+
+
+def get_stack_order(ob, protected):
+    # objects with children and protected objects are kept, then real objects before instances, then the first by name
+    return (not ob.children and ob not in protected, ob.instance_type == 'COLLECTION', ob.name)
+
+
+@timed_function("remove_stacked_duplicates")
+def remove_stacked_duplicates(obs, tolerance=STACK_TOLERANCE):
+    '''Keep one object of every stack and remove the others. Objects with children, targets of constraints,
+    modifiers and radial arrays and objects of radial source collections aren't removed.
+    Returns the number of removed objects and the number of stacks'''
+    stacks = find_stacks(obs, tolerance)
+    protected = get_protected_objects() if stacks else set()
+    removed_obs = []
+    for stack in stacks:
+        stack.sort(key=lambda ob: get_stack_order(ob, protected))
+        removed_obs += [ob for ob in stack[1:] if not ob.children and ob not in protected]
+
+    source_colls = {ob.instance_collection for ob in removed_obs if is_source_collection(ob.instance_collection)}
+    if removed_obs:
+        bpy.data.batch_remove(removed_obs)
+    for coll in source_colls:
+        remove_unused_source_collection(coll)
+    return len(removed_obs), len(stacks)
             
 
 class OBJECT_OT_duplicate_radially(bpy.types.Operator):
@@ -62,65 +548,171 @@ class OBJECT_OT_duplicate_radially(bpy.types.Operator):
         description = "Rotation axis",
         default = 'LOCAL_Z')
         
+    output_mode: bpy.props.EnumProperty(
+        name = "Output",
+        items = OUTPUT_MODE_ITEMS,
+        description = "Type of created duplicates",
+        default = 'OBJECTS')
+        
+    use_selected: bpy.props.BoolProperty(
+        name = "Selected Objects",
+        default = False,
+        description = "Duplicate all selected objects",
+        options={'SKIP_SAVE'} )
+        
+    rings: bpy.props.IntProperty(
+        name = "Rings",
+        default = 1,
+        min = 1,
+        description = "Number of concentric rings")
+        
+    ring_offset: bpy.props.FloatProperty(
+        name = "Ring Offset",
+        default = 1.0,
+        subtype = 'DISTANCE',
+        description = "Distance between rings, every next ring is moved away from the axis")
+        
+    ring_count_step: bpy.props.IntProperty(
+        name = "Ring Count Step",
+        default = 0,
+        description = "Number of objects added to every next ring")
+        
+    turns: bpy.props.FloatProperty(
+        name = "Turns",
+        default = 1.0,
+        min = 0.0,
+        description = "Number of full circles the objects of a ring are spread over")
+        
+    step_height: bpy.props.FloatProperty(
+        name = "Step Height",
+        default = 0.0,
+        subtype = 'DISTANCE',
+        description = "Offset along the axis between neighbour objects, makes a helix")
+        
+    step_twist: bpy.props.FloatProperty(
+        name = "Step Twist",
+        default = 0.0,
+        subtype = 'ANGLE',
+        description = "Rotation of every next object around its own origin")
+        
+    skip_existing: bpy.props.BoolProperty(
+        name = "Skip Existing",
+        default = True,
+        description = "Don't add duplicates where an object with the same data and transforms already exists")
+        
+    use_hierarchy: bpy.props.BoolProperty(
+        name = "Hierarchy",
+        default = False,
+        description = "Duplicate the active object with its children as one unit, with other selected objects if Selected Objects is enabled. "
+            "Existing duplicates aren't skipped")
+        
     @classmethod
     def poll(cls, context):
         return (context.object is not None and context.area.type == 'VIEW_3D')
 
     def execute(self, context):
-        duplicate_radially(context, self.linked_count, self.spin_axis)
+        if self.use_hierarchy:
+            duplicate_hierarchy_radially(context, self.linked_count, self.spin_axis, get_selected_objects(context, self.use_selected),
+                                         self.output_mode, get_pattern(self))
+            return {'FINISHED'}
+        # one index of the scene is shared by all objects
+        index = PlacementIndex(context.scene.objects) if self.skip_existing else None
+        for ob in get_selected_objects(context, self.use_selected):
+            duplicate_radially(context, self.linked_count, self.spin_axis, output_mode=self.output_mode, ob=ob,
+                               pattern=get_pattern(self), skip_existing=self.skip_existing, index=index)
         return {'FINISHED'}
         
     def invoke(self, context, event):
+        if event.alt:
+            self.use_selected = True
         self.execute(context)
         return {'FINISHED'}
 
 
-class OBJECT_OT_duplicate_radially_modal(bpy.types.Operator):
-    '''Add linked duplicates radially around the 3D cursor'''
-    bl_idname = "object.duplicate_radially_modal"
-    bl_label = "Duplicate Radially Modal"
-    bl_options = {'REGISTER', 'UNDO', 'BLOCKING'}
+class DuplicateRadiallyModal:
+    '''Logic of the duplicate radially modal, kept apart from the operator so recorded sessions can be replayed without the UI'''
     
-    @classmethod
-    def poll(cls, context):
-        return (context.object is not None and context.area.type == 'VIEW_3D')
-        
-    linked_count: bpy.props.IntProperty(                        
-        name = "Count",       
-        default = 6,
-        min = 1,
-        description = "Total number of linked objects")
-        
-    spin_axis: bpy.props.EnumProperty(                        
-        name = "Spin Axis", 
-        items = [('LOCAL_X', "Local X", "Local X"),    
-             ('LOCAL_Y', "Local Y", "Local Y"),    
-             ('LOCAL_Z', "Local Z", "Local Z"), 
-             ('VIEW_Z', "View Z", "View Z")],
-        description = "Rotation axis",
-        default = 'LOCAL_Z')
-        
     def __init__(self):
         self.type_count = 0
         
     def invoke(self, context, event):
-        self.dupli_obs = duplicate_radially(context, self.linked_count, self.spin_axis)
+        self.recorder = start_recording(context, self, event)
+        self.use_selected = self.use_selected or event.alt
+        self.obs = get_selected_objects(context, self.use_selected)
+        # replayed sessions run without a window
+        self.area = context.area
+        self.job = None
+        self.create_pools(context)
+        self.reduplicate(context)
         
-        self.mouse_region_x = event.mouse_region_x
-        self.mouse_region_y = event.mouse_region_y
+        self.overlay = OverlayLayout(event.mouse_region_x, event.mouse_region_y)
 
-        context.window_manager.modal_handler_add(self)
-        context.area.header_text_set("Total count: %s   Spin axis: %s" % (self.linked_count, self.spin_axis.title()))
-        context.workspace.status_text_set(text="LMB, ENTER: Confirm | RMB, ESC: Cancel | X: Local X | Y: Local Y | Z: Local Z | V: View Z") 
-        self.handler = context.space_data.draw_handler_add(self.draw_ui, (context,), 'WINDOW', 'POST_PIXEL')
+        if self.area is not None:
+            context.window_manager.modal_handler_add(self)
+            context.workspace.status_text_set(text="LMB, ENTER: Confirm | RMB, ESC: Cancel | X: Local X | Y: Local Y | Z: Local Z | V: View Z | C: Toggle collection instances | D: Skip existing duplicates") 
+            self.handler = context.space_data.draw_handler_add(self.draw_ui, (context,), 'WINDOW', 'POST_PIXEL')
+        profiling.start_session(context, "Duplicate Radially")
         return {'RUNNING_MODAL'}
 
+    def create_pools(self, context):
+        self.pools = [DuplicatePool(context, ob, self.output_mode) for ob in self.obs]
+        if self.skip_existing:
+            self.index_pools(context)
+            
+    def index_pools(self, context):
+        # one index of the scene is shared by pools of all objects
+        index = PlacementIndex(context.scene.objects)
+        for pool in self.pools:
+            pool.index = index
+
+    @timed_function("modal update")
     def reduplicate(self, context):
-        self.remove_duplicates(context)
-        self.dupli_obs = duplicate_radially(context, self.linked_count, self.spin_axis)
-        context.area.header_text_set("Total count: %s   Spin axis: %s" % (self.linked_count, self.spin_axis.title()))
+        self.cancel_job()
+        pattern = get_pattern(self)
+        matrices = [get_radial_matrices(context, pool.ob_mx, self.linked_count, self.spin_axis, pattern) for pool in self.pools]
+        if self.skip_existing:
+            matrices = [pool.get_free_matrices(mxs) for pool, mxs in zip(self.pools, matrices)]
+        
+        # many new duplicates are created in chunks, so the tool can be cancelled meanwhile
+        missing = sum(max(len(mxs) - len(pool.obs), 0) for pool, mxs in zip(self.pools, matrices))
+        if missing > CHUNK_THRESHOLD:
+            self.job = DuplicateJob(self.pools, matrices, self.on_job_update)
+        else:
+            for pool, mxs in zip(self.pools, matrices):
+                pool.resize(len(mxs))
+                pool.transform(mxs)
+        self.update_header()
+        
+    def on_job_update(self, job):
+        if job.finished:
+            self.job = None
+        self.update_header()
+        if self.area is not None:
+            self.area.tag_redraw()
+        
+    def cancel_job(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+            
+    def finish_job(self):
+        # confirmed count is created at once
+        if self.job is not None:
+            self.job.run()
+            
+    def flush(self, context):
+        self.finish_job()
+
+    def update_header(self):
+        text = "Total count: %s   Spin axis: %s   Output: %s" % (self.linked_count, self.spin_axis.title(), OUTPUT_MODE_NAMES[self.output_mode])
+        if self.job is not None:
+            text += "   Creating duplicates: %s / %s (ESC: Cancel)" % (self.job.created, self.job.total)
+        if self.area is not None:
+            self.area.header_text_set(text)
 
     def modal(self, context, event):
+        if self.recorder is not None:
+            self.recorder.record(event)
 
         if event.value == 'PRESS':
             if event.type == 'MIDDLEMOUSE':
@@ -169,6 +761,18 @@ class OBJECT_OT_duplicate_radially_modal(bpy.types.Operator):
             elif event.type == 'V':
                 self.spin_axis = 'VIEW_Z'
                 self.reduplicate(context)
+                
+            elif event.type == 'D':
+                self.skip_existing = not self.skip_existing
+                if self.skip_existing and self.pools and self.pools[0].index is None:
+                    self.index_pools(context)
+                self.reduplicate(context)
+                
+            elif event.type == 'C':
+                self.output_mode = 'OBJECTS' if self.output_mode == 'COLLECTION' else 'COLLECTION'
+                self.remove_duplicates(context)
+                self.create_pools(context)
+                self.reduplicate(context)
         
             elif event.type in ('ESC', 'RIGHTMOUSE'):
                 self.remove_duplicates(context)
@@ -176,57 +780,212 @@ class OBJECT_OT_duplicate_radially_modal(bpy.types.Operator):
                 return {'CANCELLED'}
                 
             elif event.type in ('SPACE', 'LEFTMOUSE'):
+                self.finish_job()
+                for pool in self.pools:
+                    pool.trim()
                 self.finish_modal(context)
                 return {'FINISHED'}
 
         return {'RUNNING_MODAL'}
         
     def remove_duplicates(self, context):
-        for ob in self.dupli_obs:
-            bpy.data.objects.remove(ob, do_unlink=True)
+        self.cancel_job()
+        for pool in self.pools:
+            pool.clear()
 
     def finish_modal(self, context):
-        context.area.header_text_set(text=None)
-        context.workspace.status_text_set(text=None)
-        context.space_data.draw_handler_remove(self.handler, 'WINDOW')
-        context.region.tag_redraw()
+        self.cancel_job()
+        profiling.end_session(context)
+        end_recording(context, self.recorder, "Duplicate Radially")
+        if self.area is not None:
+            self.area.header_text_set(text=None)
+            context.workspace.status_text_set(text=None)
+            context.space_data.draw_handler_remove(self.handler, 'WINDOW')
+            self.area.tag_redraw()
         
+    @timed_function("draw_ui")
     def draw_ui(self, context):
-        ui_scale = context.preferences.view.ui_scale
-    
         main_color = (1.0, 1.0, 1.0, 1.0)
         val_color = (*context.preferences.themes[0].view_3d.object_active, 1)
-        key_color = context.preferences.themes[0].view_3d.face_select
+        key_color = tuple(context.preferences.themes[0].view_3d.face_select)
         
-        ui_width, ui_height = 250, 50
-        ui_offset = 50*ui_scale
+        text_lines = [
+            (("Total Count: ", main_color), 
+             ("(Scroll) ", key_color),
+             (str(self.linked_count), val_color)),
+            (("Spin Axis: ", main_color), 
+             ("(XYZV) ", key_color),
+             (str(self.spin_axis.title()), val_color)),
+            (("Output: ", main_color), 
+             ("(C) ", key_color),
+             (OUTPUT_MODE_NAMES[self.output_mode], val_color)),
+            (("Skip Existing: ", main_color), 
+             ("(D) ", key_color),
+             ("On" if self.skip_existing else "Off", val_color))]
+        if self.job is not None:
+            text_lines.append(
+                (("Creating: ", main_color), 
+                 ("(Esc) ", key_color),
+                 ("%d%%" % (self.job.progress*100), val_color)))
+        self.overlay.draw(context, tuple(text_lines))
+
+
+class OBJECT_OT_duplicate_radially_modal(DuplicateRadiallyModal, bpy.types.Operator):
+    '''Add linked duplicates radially around the 3D cursor.
++ Alt: Duplicate all selected objects'''
+    bl_idname = "object.duplicate_radially_modal"
+    bl_label = "Duplicate Radially Modal"
+    bl_options = {'REGISTER', 'UNDO', 'BLOCKING'}
     
-        font = 0
-        font_size = int(18*ui_scale)
-        align = "LEFT"
+    @classmethod
+    def poll(cls, context):
+        return (context.object is not None and context.area.type == 'VIEW_3D')
+        
+    linked_count: bpy.props.IntProperty(                        
+        name = "Count",       
+        default = 6,
+        min = 1,
+        description = "Total number of linked objects")
+        
+    spin_axis: bpy.props.EnumProperty(                        
+        name = "Spin Axis", 
+        items = [('LOCAL_X', "Local X", "Local X"),    
+             ('LOCAL_Y', "Local Y", "Local Y"),    
+             ('LOCAL_Z', "Local Z", "Local Z"), 
+             ('VIEW_Z', "View Z", "View Z")],
+        description = "Rotation axis",
+        default = 'LOCAL_Z')
+        
+    output_mode: bpy.props.EnumProperty(
+        name = "Output",
+        items = OUTPUT_MODE_ITEMS,
+        description = "Type of created duplicates",
+        default = 'OBJECTS')
+        
+    use_selected: bpy.props.BoolProperty(
+        name = "Selected Objects",
+        default = False,
+        description = "Duplicate all selected objects",
+        options={'SKIP_SAVE'} )
+        
+    rings: bpy.props.IntProperty(
+        name = "Rings",
+        default = 1,
+        min = 1,
+        description = "Number of concentric rings")
+        
+    ring_offset: bpy.props.FloatProperty(
+        name = "Ring Offset",
+        default = 1.0,
+        subtype = 'DISTANCE',
+        description = "Distance between rings, every next ring is moved away from the axis")
+        
+    ring_count_step: bpy.props.IntProperty(
+        name = "Ring Count Step",
+        default = 0,
+        description = "Number of objects added to every next ring")
         
-        safe_x, safe_y = get_safe_draw_x(context, ui_width + ui_offset), ui_height + ui_offset
-        mouse_offset_x = self.mouse_region_x + ui_offset
-        mouse_offset_y = self.mouse_region_y - ui_offset
-        newline_x = min(safe_x, mouse_offset_x)
-        newline_y = max(safe_y, mouse_offset_y)
+    turns: bpy.props.FloatProperty(
+        name = "Turns",
+        default = 1.0,
+        min = 0.0,
+        description = "Number of full circles the objects of a ring are spread over")
+        
+    step_height: bpy.props.FloatProperty(
+        name = "Step Height",
+        default = 0.0,
+        subtype = 'DISTANCE',
+        description = "Offset along the axis between neighbour objects, makes a helix")
+        
+    step_twist: bpy.props.FloatProperty(
+        name = "Step Twist",
+        default = 0.0,
+        subtype = 'ANGLE',
+        description = "Rotation of every next object around its own origin")
+        
+    skip_existing: bpy.props.BoolProperty(
+        name = "Skip Existing",
+        default = True,
+        description = "Don't add duplicates where an object with the same data and transforms already exists")
+
+
+class OBJECT_OT_make_radial_instances_real(bpy.types.Operator):
+    '''Replace selected radial collection instances with linked duplicates of their source objects'''
+    bl_idname = "object.make_radial_instances_real"
+    bl_label = "Make Radial Instances Real"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @classmethod
+    def poll(cls, context):
+        return (context.mode == 'OBJECT' and any(is_source_collection(ob.instance_collection) for ob in context.selected_objects))
+
+    def execute(self, context):
+        view3d = get_view3d(context)
+        instance_obs = [ob for ob in context.selected_objects
+                        if ob.instance_type == 'COLLECTION' and is_source_collection(ob.instance_collection)]
+        source_colls = {ob.instance_collection for ob in instance_obs}
+        
+        real_obs = []
+        for instance_ob in instance_obs:
+            coll = instance_ob.instance_collection
+            instance_mx = instance_ob.matrix_world @ Matrix.Translation(-coll.instance_offset)
+            target_coll = get_target_collection(instance_ob)
+            # objects of duplicated hierarchies keep their relations inside every copy
+            mapping = copy_unit(coll.objects)
+            for ob, real_ob in mapping.items():
+                target_coll.objects.link(real_ob)
+                if ob.parent not in mapping:
+                    real_ob.matrix_world = instance_mx @ ob.matrix_world
+                if view3d and view3d.local_view:
+                    real_ob.local_view_set(view3d, True)
+                real_obs.append(real_ob)
+                
+        bpy.data.batch_remove(instance_obs)
+        for coll in source_colls:
+            remove_unused_source_collection(coll)
+            
+        for real_ob in real_obs:
+            real_ob.select_set(True)
+        if real_obs and context.view_layer.objects.active is None:
+            context.view_layer.objects.active = real_obs[0]
+        return {'FINISHED'}
 
-        newline_y = draw_text_line([
-            ("Total Count: ", main_color), 
-            ("(Scroll) ", key_color),
-            (str(self.linked_count), val_color)],
-            newline_x, newline_y, align, font, font_size)
 
-        newline_y = draw_text_line([
-            ("Spin Axis: ", main_color), 
-            ("(XYZV) ", key_color),
-            (str(self.spin_axis.title()), val_color)],
-            newline_x, newline_y, align, font, font_size)
+class OBJECT_OT_remove_stacked_duplicates(bpy.types.Operator):
+    '''Find objects showing the same data with the same transforms, modifiers and materials
+    and keep one object of every stack'''
+    bl_idname = "object.remove_stacked_duplicates"
+    bl_label = "Remove Stacked Duplicates"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    use_selected: bpy.props.BoolProperty(
+        name = "Only Selected",
+        default = False,
+        description = "Only look for stacks among selected objects")
+        
+    tolerance: bpy.props.FloatProperty(
+        name = "Tolerance",
+        default = STACK_TOLERANCE,
+        min = 0.0,
+        precision = 5,
+        description = "Maximum difference of transform matrix values of stacked objects")
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT'
+
+    def execute(self, context):
+        obs = context.selected_objects if self.use_selected else context.scene.objects
+        removed, stacks = remove_stacked_duplicates(obs, self.tolerance)
+        self.report({'INFO'}, "Removed %d stacked duplicates from %d stacks" % (removed, stacks))
+        return {'FINISHED'}
 
 
 classes = (
     OBJECT_OT_duplicate_radially,
-    OBJECT_OT_duplicate_radially_modal
+    OBJECT_OT_duplicate_radially_modal,
+    OBJECT_OT_make_radial_instances_real,
+    OBJECT_OT_remove_stacked_duplicates,
 )
 
 
@@ -0,0 +1,263 @@
+'''Radial transform math shared by the radial array and radial instances tools.
+
+Only depends on NumPy, so it can be imported and tested outside of Blender.
+Matrices are row-major 4x4 like mathutils.Matrix, angles are in radians.
+'''
+
+from math import tau
+
+import numpy as np
+
+
+AXIS_COLUMNS = {'LOCAL_X': 0, 'LOCAL_Y': 1, 'LOCAL_Z': 2}
+
+
+def get_spin_vector(matrix, spin_axis, view_matrix=None):
+    '''World space spin vector - a column of the object matrix or view Z axis'''
+    if spin_axis == 'VIEW_Z':
+        # same as Vector((0, 0, 1)) @ view_matrix
+        return np.array(view_matrix, dtype=np.float64)[2, :3]
+    return np.array(matrix, dtype=np.float64)[:3, AXIS_COLUMNS[spin_axis]]
+
+
+def remove_scale(matrix):
+    '''Copy of the matrix with unit scale, same as setting the scale of an object with this world matrix to 1'''
+    matrix = np.array(matrix, dtype=np.float64)
+    lengths = np.linalg.norm(matrix[:3, :3], axis=0)
+    matrix[:3, :3] /= np.where(lengths == 0, 1, lengths)
+    # negative scale is decomposed as a negative uniform scale and a flipped rotation
+    if np.linalg.det(matrix[:3, :3]) < 0:
+        matrix[:3, :3] *= -1
+    return matrix
+
+
+def rotation_matrices(axis, angles):
+    '''(N, 3, 3) rotations around the axis, same as Matrix.Rotation(angle, 3, axis) for every angle'''
+    axis = np.asarray(axis, dtype=np.float64)
+    x, y, z = axis / np.linalg.norm(axis)
+    angles = np.asarray(angles, dtype=np.float64)
+    c = np.cos(angles)
+    s = np.sin(angles)
+    t = 1 - c
+
+    rot_mxs = np.empty((len(angles), 3, 3))
+    rot_mxs[:, 0, 0] = t*x*x + c
+    rot_mxs[:, 0, 1] = t*x*y - s*z
+    rot_mxs[:, 0, 2] = t*x*z + s*y
+    rot_mxs[:, 1, 0] = t*x*y + s*z
+    rot_mxs[:, 1, 1] = t*y*y + c
+    rot_mxs[:, 1, 2] = t*y*z - s*x
+    rot_mxs[:, 2, 0] = t*x*z - s*y
+    rot_mxs[:, 2, 1] = t*y*z + s*x
+    rot_mxs[:, 2, 2] = t*z*z + c
+    return rot_mxs
+
+
+def spin_matrices(center, axis, angles, base_matrix=None):
+    '''(N, 4, 4) rotations around the axis passing through the center, applied to the base matrix'''
+    center = np.asarray(center, dtype=np.float64)
+    base_matrix = np.identity(4) if base_matrix is None else np.asarray(base_matrix, dtype=np.float64)
+    rot_mxs = rotation_matrices(axis, angles)
+
+    spin_mxs = np.zeros((len(rot_mxs), 4, 4))
+    spin_mxs[:, :3, :3] = rot_mxs @ base_matrix[:3, :3]
+    spin_mxs[:, :3, 3] = rot_mxs @ (base_matrix[:3, 3] - center) + center
+    spin_mxs[:, 3] = base_matrix[3]
+    return spin_mxs
+
+
+def radial_matrices(center, axis, count, base_matrix, start=1, stop=None):
+    '''(N, 4, 4) matrices of the base matrix placed evenly around the axis in count steps.
+    By default returns steps from 1 to count - 1, that is all copies except the base itself'''
+    if count < 1:
+        return np.zeros((0, 4, 4))
+    stop = count if stop is None else stop
+    angles = np.arange(start, stop) * (tau / count)
+    return spin_matrices(center, axis, angles, base_matrix)
+
+
+def matrix_powers(matrix, count):
+    '''(count, 4, 4) array of the matrix raised to powers from 0 to count - 1'''
+    matrix = np.asarray(matrix, dtype=np.float64)
+    powers = np.empty((count, 4, 4))
+    powers[0] = np.identity(4)
+    for i in range(1, count):
+        powers[i] = powers[i - 1] @ matrix
+    return powers
+
+
+def get_rotation_axis_center(matrix):
+    '''Axis and a point on the axis of the rotation made by the matrix, matrix is expected to be rigid.
+    Axis is directed so the rotation is counterclockwise around it. Identity matrix gives Z axis and origin'''
+    matrix = np.asarray(matrix, dtype=np.float64)
+    rot = matrix[:3, :3]
+    values, vectors = np.linalg.eig(rot)
+    axis = np.real(vectors[:, np.argmin(np.abs(values - 1))])
+    skew = np.array((rot[2, 1] - rot[1, 2], rot[0, 2] - rot[2, 0], rot[1, 0] - rot[0, 1]))
+    if np.allclose(rot, np.identity(3)):
+        axis = np.array((0.0, 0.0, 1.0))
+    elif np.dot(skew, axis) < 0:
+        axis = -axis
+
+    # points on the axis are fixed, (I - R) c = t has a line of solutions, the closest one to the origin is taken
+    center = np.linalg.lstsq(np.identity(3) - rot, matrix[:3, 3], rcond=None)[0]
+    return axis / np.linalg.norm(axis), center
+
+
+def is_rigid(matrix, tolerance=1e-6):
+    '''Whether the matrix only rotates and translates'''
+    mx3 = np.asarray(matrix, dtype=np.float64)[:3, :3]
+    return np.allclose(mx3.T @ mx3, np.identity(3), atol=tolerance)
+
+
+HASH_PRIMES = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+NEIGHBOR_CELLS = np.array([(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1)], dtype=np.int64)
+
+
+def find_close_pairs(coords_a, coords_b, threshold):
+    '''Index arrays (indices_a, indices_b) of points of a and b not further than threshold from each other.
+    Points of b are hashed into a grid with threshold sized cells, so every point of a is only
+    compared with points of b in neighbouring cells'''
+    coords_a = np.asarray(coords_a, dtype=np.float64).reshape(-1, 3)
+    coords_b = np.asarray(coords_b, dtype=np.float64).reshape(-1, 3)
+    empty = np.zeros(0, dtype=np.int64)
+    if not len(coords_a) or not len(coords_b) or threshold <= 0:
+        return empty, empty
+
+    # points of a outside of the bounding box of b can't have close points
+    in_bounds = np.all((coords_a >= coords_b.min(axis=0) - threshold) & (coords_a <= coords_b.max(axis=0) + threshold), axis=1)
+    candidates = np.flatnonzero(in_bounds)
+
+    # hash collisions are possible, they are filtered out by distance check
+    keys_b = np.floor(coords_b / threshold).astype(np.int64) @ HASH_PRIMES
+    order_b = np.argsort(keys_b, kind='stable')
+    sorted_keys_b = keys_b[order_b]
+
+    # hash is linear, so keys of neighbouring cells are sorted in the same order and searched faster
+    keys_a = np.floor(coords_a[candidates] / threshold).astype(np.int64) @ HASH_PRIMES
+    order_a = np.argsort(keys_a, kind='stable')
+    candidates = candidates[order_a]
+    keys_a = keys_a[order_a]
+
+    indices_a, indices_b = [], []
+    for neighbor_key in NEIGHBOR_CELLS @ HASH_PRIMES:
+        neighbor_keys_a = keys_a + neighbor_key
+        starts = np.searchsorted(sorted_keys_b, neighbor_keys_a, 'left')
+        counts = np.searchsorted(sorted_keys_b, neighbor_keys_a, 'right') - starts
+        hits = np.flatnonzero(counts)
+        if not len(hits):
+            continue
+
+        hit_counts = counts[hits]
+        pair_a = np.repeat(candidates[hits], hit_counts)
+        offsets = np.arange(hit_counts.sum()) - np.repeat(np.cumsum(hit_counts) - hit_counts, hit_counts)
+        pair_b = order_b[np.repeat(starts[hits], hit_counts) + offsets]
+
+        close = ((coords_a[pair_a] - coords_b[pair_b]) ** 2).sum(axis=1) <= threshold ** 2
+        indices_a.append(pair_a[close])
+        indices_b.append(pair_b[close])
+
+    if not indices_a:
+        return empty, empty
+    pairs = np.unique(np.column_stack((np.concatenate(indices_a), np.concatenate(indices_b))), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def get_weld_map(vertex_count, indices_a, indices_b):
+    '''Merge pairs of vertices into groups, every group is merged into its vertex with the lowest index.
+    Returns new index of every vertex and mask of vertices that are kept'''
+    indices_a = np.asarray(indices_a, dtype=np.int64)
+    indices_b = np.asarray(indices_b, dtype=np.int64)
+    remap = np.arange(vertex_count)
+
+    if len(indices_a):
+        # propagate the lowest index through groups of welded vertices
+        nodes, local = np.unique(np.concatenate((indices_a, indices_b)), return_inverse=True)
+        local_a, local_b = local.ravel()[:len(indices_a)], local.ravel()[len(indices_a):]
+        labels = np.arange(len(nodes))
+        while True:
+            lowest = np.minimum(labels[local_a], labels[local_b])
+            new_labels = labels.copy()
+            np.minimum.at(new_labels, local_a, lowest)
+            np.minimum.at(new_labels, local_b, lowest)
+            new_labels = new_labels[new_labels]
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+        remap[nodes] = nodes[labels]
+
+    kept = remap == np.arange(vertex_count)
+    new_indices = np.cumsum(kept) - 1
+    return new_indices[remap], kept
+
+
+def get_edge_map(edges):
+    '''Remove duplicates of (N, 2) edges, edges with the same vertices in any order are duplicates.
+    Returns indices of kept edges in order of their first occurrence and new index of every edge'''
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    _, first, inverse = np.unique(np.sort(edges, axis=1), axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order))
+    return first[order], ranks[inverse.ravel()]
+
+
+def get_perpendicular(vector, axis):
+    '''Unit part of the vector perpendicular to the axis, any unit vector perpendicular to the axis if it's parallel'''
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    perpendicular = np.asarray(vector, dtype=np.float64) - axis * np.dot(vector, axis)
+    if np.linalg.norm(perpendicular) < 1e-9:
+        perpendicular = np.cross(axis, (1, 0, 0) if abs(axis[0]) < .9 else (0, 1, 0))
+    return perpendicular / np.linalg.norm(perpendicular)
+
+
+def pattern_matrices(center, axis, count, base_matrix, rings=1, ring_offset=0.0, ring_count_step=0,
+                     turns=1.0, step_height=0.0, step_twist=0.0):
+    '''(N, 4, 4) matrices of the base matrix placed in concentric rings or helices around the axis.
+    Ring i has count + i*ring_count_step copies spread over turns full circles and is moved away
+    from the axis by i*ring_offset. Every next copy in a ring is moved along the axis by step_height
+    and rotated around its own origin by step_twist. The base itself is not included'''
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    center = np.asarray(center, dtype=np.float64)
+    base_matrix = np.asarray(base_matrix, dtype=np.float64)
+    base_loc = base_matrix[:3, 3]
+
+    ring_counts = np.maximum(count + np.arange(rings) * ring_count_step, 0)
+    if not ring_counts.sum():
+        return np.zeros((0, 4, 4))
+    ring_indices = np.repeat(np.arange(rings), ring_counts)
+    step_indices = np.arange(len(ring_indices)) - np.repeat(np.cumsum(ring_counts) - ring_counts, ring_counts)
+    angles = step_indices * (tau * turns / ring_counts[ring_indices])
+
+    # twist around the base origin, then offset from the axis and along it, then spin around the axis
+    mxs = spin_matrices(base_loc, axis, step_indices * step_twist, base_matrix)
+    mxs[:, :3, 3] += np.outer(ring_indices * ring_offset, get_perpendicular(base_loc - center, axis))
+    mxs[:, :3, 3] += np.outer(step_indices * step_height, axis)
+    rot_mxs = rotation_matrices(axis, angles)
+    mxs[:, :3, :3] = rot_mxs @ mxs[:, :3, :3]
+    mxs[:, :3, 3] = (rot_mxs @ (mxs[:, :3, 3] - center)[:, :, None])[:, :, 0] + center
+    # the first copy of the first ring is the base, rings after an empty first ring don't include it
+    return mxs[1:] if ring_counts[0] else mxs
+
+
+def decompose_matrices(matrices):
+    '''Locations, XYZ euler rotations and scales of (N, 4, 4) matrices, same as Matrix.decompose for every matrix
+    with the rotation converted by to_euler('XYZ'). Negative scale is put on the X axis'''
+    matrices = np.asarray(matrices)
+    locations = matrices[:, :3, 3].astype(np.float32)
+    rot = matrices[:, :3, :3].astype(np.float64)
+    scales = np.linalg.norm(rot, axis=1)
+    flipped = np.linalg.det(rot) < 0
+    scales[flipped, 0] *= -1
+    rot = rot / np.where(scales == 0, 1, scales)[:, None, :]
+
+    # rotation is Rz @ Ry @ Rx, x and z are undefined when y is +-90 degrees, then z is taken as 0
+    cos_y = np.hypot(rot[:, 0, 0], rot[:, 1, 0])
+    gimbal = cos_y < 1e-6
+    eulers = np.empty((len(rot), 3))
+    eulers[:, 0] = np.where(gimbal, np.arctan2(-rot[:, 1, 2], rot[:, 1, 1]), np.arctan2(rot[:, 2, 1], rot[:, 2, 2]))
+    eulers[:, 1] = np.arctan2(-rot[:, 2, 0], cos_y)
+    eulers[:, 2] = np.where(gimbal, 0.0, np.arctan2(rot[:, 1, 0], rot[:, 0, 0]))
+    return locations, eulers.astype(np.float32), scales.astype(np.float32)
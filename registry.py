@@ -0,0 +1,204 @@
+'''Registry of radial arrays.
+
+Parameters of the radial array of an object are stored in its radial_array property and
+objects with radial arrays are indexed in the radial_arrays property of the scene, so batch
+tools don't have to scan modifiers of every object.
+'''
+
+import bpy
+
+
+SPIN_AXIS_ITEMS = [
+    ('LOCAL_X', "Local X", "Local X"),
+    ('LOCAL_Y', "Local Y", "Local Y"),
+    ('LOCAL_Z', "Local Z", "Local Z"),
+    ('VIEW_Z', "View Z", "View Z")]
+
+
+def update_viewport_segments(self, context):
+    from .radial_array import update_lod
+    ob = self.id_data
+    array = ob.modifiers.get(self.modifier) if self.modifier else None
+    if array is not None:
+        update_lod(context, ob, array)
+
+
+class RadialArraySettings(bpy.types.PropertyGroup):
+    modifier: bpy.props.StringProperty(
+        name = "Modifier",
+        default = "",
+        description = "Name of the radial array modifier, empty if the object has no registered radial array")
+
+    segments: bpy.props.IntProperty(
+        name = "Segments",
+        default = 6,
+        min = 1,
+        description = "Number of segments")
+
+    spin_axis: bpy.props.EnumProperty(
+        name = "Spin Axis",
+        items = SPIN_AXIS_ITEMS,
+        description = "Spin axis",
+        default = 'LOCAL_Z')
+
+    spin_vector: bpy.props.FloatVectorProperty(
+        name = "Spin Vector",
+        default = (0.0, 0.0, 1.0),
+        description = "Spin vector in object space, so view aligned arrays keep their axis when the object rotates")
+
+    center_on_cursor: bpy.props.BoolProperty(
+        name = "Center on Cursor",
+        default = False,
+        description = "Array is centered on the 3D cursor location instead of the object origin")
+
+    center: bpy.props.FloatVectorProperty(
+        name = "Center",
+        subtype = 'TRANSLATION',
+        description = "World space array center, used if the array is centered on the 3D cursor")
+
+    helper: bpy.props.PointerProperty(
+        name = "Helper",
+        type = bpy.types.Object,
+        description = "Helper empty of the radial array")
+
+    viewport_segments: bpy.props.IntProperty(
+        name = "Viewport Segments",
+        default = 0,
+        min = 0,
+        description = "Number of segments drawn in the viewport while scene viewport LOD is on, 0 to always draw all segments",
+        update = update_viewport_segments)
+
+    lod_modifier: bpy.props.StringProperty(
+        name = "LOD Modifier",
+        default = "",
+        description = "Name of the modifier drawing the radial array with viewport segments")
+
+    lod_helper: bpy.props.PointerProperty(
+        name = "LOD Helper",
+        type = bpy.types.Object,
+        description = "Helper empty of the viewport LOD modifier")
+
+
+class RadialArrayRef(bpy.types.PropertyGroup):
+    object: bpy.props.PointerProperty(type=bpy.types.Object)
+
+
+def get_indexed_objects(scene):
+    '''Set of objects of the scene index, it can be built once and passed to record_radial_array of many objects'''
+    return {ref.object for ref in scene.radial_arrays}
+
+
+def record_radial_array(scene, ob, array, segments, spin_axis, spin_vec, center_on_cursor, array_center, indexed_obs=None):
+    '''Store parameters of the radial array in the object and add the object to the scene index.
+    If indexed_obs set of get_indexed_objects is given, it's used instead of looking through the index and updated'''
+    import numpy as np
+    from .radial_math import remove_scale
+    settings = ob.radial_array
+    settings.modifier = array.name
+    settings.segments = segments
+    settings.spin_axis = spin_axis
+    settings.spin_vector = (remove_scale(ob.matrix_world)[:3, :3].T @ np.asarray(spin_vec, dtype=np.float64)).tolist()
+    settings.center_on_cursor = center_on_cursor
+    settings.center = array_center
+    settings.helper = getattr(array, "offset_object", None)
+
+    if indexed_obs is None:
+        indexed_obs = get_indexed_objects(scene)
+    if ob not in indexed_obs:
+        scene.radial_arrays.add().object = ob
+        indexed_obs.add(ob)
+
+
+def forget_radial_array(ob):
+    '''Mark the object as having no registered radial array, it's removed from the index on the next lookup'''
+    ob.radial_array.modifier = ""
+    ob.radial_array.helper = None
+    ob.radial_array.lod_modifier = ""
+    ob.radial_array.lod_helper = None
+
+
+def get_settings_snapshot(ob):
+    settings = ob.radial_array
+    snapshot = {key: getattr(settings, key) for key in RadialArraySettings.__annotations__}
+    # vector properties are views of the object data
+    snapshot["spin_vector"] = tuple(snapshot["spin_vector"])
+    snapshot["center"] = tuple(snapshot["center"])
+    return snapshot
+
+
+def restore_settings_snapshot(ob, snapshot):
+    settings = ob.radial_array
+    for key, value in snapshot.items():
+        # setting viewport segments updates the viewport LOD, so it's only set if changed
+        if key != "viewport_segments" or settings.viewport_segments != value:
+            setattr(settings, key, value)
+
+
+def get_world_spin_vector(ob):
+    import numpy as np
+    from .radial_math import remove_scale
+    return remove_scale(ob.matrix_world)[:3, :3] @ np.array(ob.radial_array.spin_vector, dtype=np.float64)
+
+
+def get_registered_arrays(scene):
+    '''(object, array modifier) pairs of the scene index.
+    Entries of deleted objects and removed or renamed modifiers are dropped from the index'''
+    items = []
+    stale = []
+    for i, ref in enumerate(scene.radial_arrays):
+        ob = ref.object
+        array = ob.modifiers.get(ob.radial_array.modifier) if ob is not None and ob.radial_array.modifier else None
+        if array is None or array.type not in ('ARRAY', 'NODES') or ob.name not in scene.objects:
+            stale.append(i)
+        else:
+            items.append((ob, array))
+
+    for i in reversed(stale):
+        scene.radial_arrays.remove(i)
+    return items
+
+
+def set_lod_visibility(ob, use_lod):
+    '''Draw either the radial array or its viewport LOD modifier in the viewport, renders always use the radial array'''
+    settings = ob.radial_array
+    array = ob.modifiers.get(settings.modifier) if settings.modifier else None
+    lod = ob.modifiers.get(settings.lod_modifier) if settings.lod_modifier else None
+    if array is None or lod is None:
+        return
+    if array.show_viewport == use_lod:
+        array.show_viewport = not use_lod
+    if lod.show_viewport != use_lod:
+        lod.show_viewport = use_lod
+
+
+def update_use_lod(self, context):
+    for ob, array in get_registered_arrays(self):
+        set_lod_visibility(ob, self.radial_array_use_lod)
+
+
+classes = (
+    RadialArraySettings,
+    RadialArrayRef,
+)
+
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+    bpy.types.Object.radial_array = bpy.props.PointerProperty(type=RadialArraySettings)
+    bpy.types.Scene.radial_arrays = bpy.props.CollectionProperty(type=RadialArrayRef)
+    bpy.types.Scene.radial_array_use_lod = bpy.props.BoolProperty(
+        name = "Viewport LOD",
+        default = True,
+        description = "Draw radial arrays with their viewport segments, renders always use all segments",
+        update = update_use_lod)
+
+
+def unregister():
+    del bpy.types.Scene.radial_array_use_lod
+    del bpy.types.Scene.radial_arrays
+    del bpy.types.Object.radial_array
+    from bpy.utils import unregister_class
+    for cls in reversed(classes):
+        unregister_class(cls)
@@ -0,0 +1,113 @@
+'''Recording and replay of modal tool sessions.
+
+Modal operators record the events they receive when "Record Modal Events" is enabled in
+the timings settings and save them to a JSON file when they finish. Recorded events can be
+run through the same invoke and modal methods without the interface, see benchmarks/replay_session.py.
+'''
+
+import bpy
+import json
+import time
+from . import profiling
+
+
+# events which don't change the tool state and would make recordings large
+IGNORED_EVENTS = {'TIMER', 'TIMER_REPORT', 'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE'}
+
+
+class RecordedEvent:
+    '''Event of a recorded session with the attributes of bpy.types.Event read by the modal tools'''
+    __slots__ = ("time", "type", "value", "shift", "ctrl", "alt", "mouse_region_x", "mouse_region_y")
+
+    def __init__(self, time, type, value, shift=False, ctrl=False, alt=False, mouse_region_x=0, mouse_region_y=0):
+        self.time = time
+        self.type = type
+        self.value = value
+        self.shift = shift
+        self.ctrl = ctrl
+        self.alt = alt
+        self.mouse_region_x = mouse_region_x
+        self.mouse_region_y = mouse_region_y
+
+    @classmethod
+    def from_event(cls, event, time):
+        return cls(time, event.type, event.value, event.shift, event.ctrl, event.alt,
+                   event.mouse_region_x, event.mouse_region_y)
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+def get_operator_properties(operator):
+    return {prop.identifier: getattr(operator, prop.identifier)
+            for prop in operator.bl_rna.properties if prop.identifier != "rna_type"}
+
+
+class EventRecorder:
+    '''Events received by a modal operator with times relative to its invoke'''
+
+    def __init__(self, operator):
+        self.operator_idname = operator.bl_idname
+        self.properties = get_operator_properties(operator)
+        self.start_time = time.perf_counter()
+        self.events = []
+
+    def record(self, event):
+        if event.type not in IGNORED_EVENTS:
+            self.events.append(RecordedEvent.from_event(event, time.perf_counter() - self.start_time))
+
+    def save(self, filepath):
+        with open(filepath, "w") as f:
+            json.dump({
+                "operator": self.operator_idname,
+                "blender_version": bpy.app.version_string,
+                "properties": self.properties,
+                "events": [event.as_dict() for event in self.events],
+            }, f, indent=2)
+
+
+def start_recording(context, operator, event):
+    '''Recorder of the modal operator session if recording is enabled, the invoke event is recorded first'''
+    if not context.window_manager.radial_tools_profiling.record_events:
+        return None
+    # properties are stored before invoke changes them
+    recorder = EventRecorder(operator)
+    recorder.record(event)
+    return recorder
+
+
+def end_recording(context, recorder, name):
+    if recorder is not None:
+        recorder.save(profiling.get_output_path(context, name, ".json"))
+
+
+def load_recording(filepath):
+    '''Operator idname, operator properties and events of the recorded session'''
+    with open(filepath) as f:
+        data = json.load(f)
+    return data["operator"], data["properties"], [RecordedEvent(**event) for event in data["events"]]
+
+
+def new_session(modal_class, properties):
+    '''Instance of the modal logic class with recorded operator properties as attributes'''
+    session = modal_class()
+    for key, value in properties.items():
+        setattr(session, key, value)
+    return session
+
+
+def replay(context, session, events):
+    '''Run recorded events through invoke and modal of the session.
+    Work the modal defers to timers is flushed after every event.
+    Returns latency of every event in seconds and the result of the last event'''
+    latencies = []
+    result = {'CANCELLED'}
+    for i, event in enumerate(events):
+        start = time.perf_counter()
+        result = session.invoke(context, event) if i == 0 else session.modal(context, event)
+        if 'RUNNING_MODAL' in result:
+            session.flush(context)
+        latencies.append(time.perf_counter() - start)
+        if 'RUNNING_MODAL' not in result:
+            break
+    return latencies, result
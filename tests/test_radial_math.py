@@ -0,0 +1,208 @@
+'''Tests of radial_math, run with any Python 3 with NumPy and pytest from the repository:
+
+    python -m pytest tests -s
+
+-s prints durations of 100k cases.
+'''
+
+import importlib.util
+import os
+import time
+from math import pi, tau
+
+import numpy as np
+import pytest
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_radial_math():
+    '''Import radial_math without the add-on package, which needs bpy'''
+    spec = importlib.util.spec_from_file_location("radial_math", os.path.join(ADDON_DIR, "radial_math.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+radial_math = import_radial_math()
+
+# time limits of 100k cases are loose, they catch per item Python loops, not small regressions
+LARGE_COUNT = 100000
+LARGE_COUNT_TIME_LIMIT = 2.0
+
+
+def euler_matrix(euler):
+    '''Rotation matrix of XYZ euler angles, same as Euler.to_matrix'''
+    x, y, z = euler
+    rx = np.array(((1, 0, 0), (0, np.cos(x), -np.sin(x)), (0, np.sin(x), np.cos(x))))
+    ry = np.array(((np.cos(y), 0, np.sin(y)), (0, 1, 0), (-np.sin(y), 0, np.cos(y))))
+    rz = np.array(((np.cos(z), -np.sin(z), 0), (np.sin(z), np.cos(z), 0), (0, 0, 1)))
+    return rz @ ry @ rx
+
+
+def compose_matrix(location, euler, scale):
+    mx = np.identity(4)
+    mx[:3, :3] = euler_matrix(euler) * scale
+    mx[:3, 3] = location
+    return mx
+
+
+def brute_force_pairs(coords_a, coords_b, threshold):
+    distances = np.linalg.norm(coords_a[:, None] - coords_b[None], axis=2)
+    return set(zip(*np.nonzero(distances <= threshold)))
+
+
+def test_rotation_matrices_rotate_counterclockwise():
+    rot_mxs = radial_math.rotation_matrices((0, 0, 2), (pi/2, pi))
+    np.testing.assert_allclose(rot_mxs[0] @ (1, 0, 0), (0, 1, 0), atol=1e-12)
+    np.testing.assert_allclose(rot_mxs[1] @ (1, 0, 0), (-1, 0, 0), atol=1e-12)
+
+
+def test_rotation_matrices_are_rotations():
+    angles = np.linspace(-tau, tau, 17)
+    rot_mxs = radial_math.rotation_matrices((1, 2, 3), angles)
+    np.testing.assert_allclose(rot_mxs @ rot_mxs.transpose(0, 2, 1), np.broadcast_to(np.identity(3), rot_mxs.shape), atol=1e-12)
+    np.testing.assert_allclose(np.linalg.det(rot_mxs), 1)
+    # the axis is fixed
+    axis = np.array((1, 2, 3)) / np.linalg.norm((1, 2, 3))
+    np.testing.assert_allclose(rot_mxs @ axis, np.broadcast_to(axis, (len(angles), 3)), atol=1e-12)
+
+
+def test_radial_matrices_place_copies_around_the_center():
+    base = np.identity(4)
+    base[:3, 3] = (3, 0, 1)
+    center = (1, 0, 0)
+    mxs = radial_math.radial_matrices(center, (0, 0, 1), 4, base)
+    assert mxs.shape == (3, 4, 4)
+    np.testing.assert_allclose(mxs[:, :3, 3], ((1, 2, 1), (-1, 0, 1), (1, -2, 1)), atol=1e-12)
+    np.testing.assert_allclose(mxs[:, 3], np.broadcast_to((0, 0, 0, 1), (3, 4)))
+
+
+def test_radial_matrices_range():
+    base = np.identity(4)
+    all_mxs = radial_math.radial_matrices((0, 0, 0), (0, 0, 1), 6, base, start=0)
+    np.testing.assert_allclose(all_mxs[0], base, atol=1e-12)
+    np.testing.assert_allclose(radial_math.radial_matrices((0, 0, 0), (0, 0, 1), 6, base, 2, 4), all_mxs[2:4])
+    assert radial_math.radial_matrices((0, 0, 0), (0, 0, 1), 0, base).shape == (0, 4, 4)
+    assert radial_math.radial_matrices((0, 0, 0), (0, 0, 1), 1, base).shape == (0, 4, 4)
+
+
+def test_pattern_matrices_default_matches_radial_matrices():
+    base = compose_matrix((2, 1, 0), (.1, .2, .3), (1, 2, 3))
+    np.testing.assert_allclose(
+        radial_math.pattern_matrices((0, 0, 0), (0, 0, 1), 8, base),
+        radial_math.radial_matrices((0, 0, 0), (0, 0, 1), 8, base), atol=1e-12)
+
+
+def test_pattern_matrices_rings():
+    base = np.identity(4)
+    base[:3, 3] = (1, 0, 0)
+    mxs = radial_math.pattern_matrices((0, 0, 0), (0, 0, 1), 4, base, rings=3, ring_offset=2.0, ring_count_step=2)
+    # 4 + 6 + 8 copies without the base
+    assert mxs.shape == (17, 4, 4)
+    radii = np.linalg.norm(mxs[:, :3, 3], axis=1)
+    np.testing.assert_allclose(radii, [1]*3 + [3]*6 + [5]*8)
+
+
+def test_pattern_matrices_empty_first_ring():
+    base = np.identity(4)
+    base[:3, 3] = (1, 0, 0)
+    mxs = radial_math.pattern_matrices((0, 0, 0), (0, 0, 1), 0, base, rings=3, ring_offset=2.0, ring_count_step=2)
+    # 0 + 2 + 4 copies, none of them is the base
+    assert mxs.shape == (6, 4, 4)
+    radii = np.linalg.norm(mxs[:, :3, 3], axis=1)
+    np.testing.assert_allclose(radii, [3]*2 + [5]*4)
+
+
+def test_pattern_matrices_helix():
+    base = np.identity(4)
+    base[:3, 3] = (1, 0, 0)
+    mxs = radial_math.pattern_matrices((0, 0, 0), (0, 0, 1), 4, base, turns=2.0, step_height=.5)
+    np.testing.assert_allclose(mxs[:, 2, 3], (.5, 1, 1.5))
+    # two turns in four steps
+    np.testing.assert_allclose(mxs[0, :3, 3], (-1, 0, .5), atol=1e-12)
+
+
+def test_pattern_matrices_empty():
+    assert radial_math.pattern_matrices((0, 0, 0), (0, 0, 1), 0, np.identity(4)).shape == (0, 4, 4)
+
+
+def test_find_close_pairs_matches_brute_force():
+    rng = np.random.default_rng(0)
+    coords_a = rng.uniform(-1, 1, (300, 3))
+    coords_b = np.concatenate((rng.uniform(-1, 1, (200, 3)), coords_a[:50] + rng.normal(0, .01, (50, 3))))
+    indices_a, indices_b = radial_math.find_close_pairs(coords_a, coords_b, .05)
+    assert set(zip(indices_a, indices_b)) == brute_force_pairs(coords_a, coords_b, .05)
+
+
+def test_find_close_pairs_empty():
+    coords = np.zeros((3, 3))
+    for args in ((coords, np.zeros((0, 3)), .1), (np.zeros((0, 3)), coords, .1), (coords, coords, 0)):
+        indices_a, indices_b = radial_math.find_close_pairs(*args)
+        assert len(indices_a) == len(indices_b) == 0
+
+
+def test_get_weld_map_merges_groups_into_lowest_index():
+    # 1-3 and 3-4 make one group, 2-5 another, 0 is alone
+    new_indices, kept = radial_math.get_weld_map(6, (3, 4, 5), (1, 3, 2))
+    np.testing.assert_array_equal(kept, (True, True, True, False, False, False))
+    np.testing.assert_array_equal(new_indices, (0, 1, 2, 1, 1, 2))
+
+
+def test_get_weld_map_without_pairs():
+    new_indices, kept = radial_math.get_weld_map(4, (), ())
+    np.testing.assert_array_equal(new_indices, np.arange(4))
+    assert kept.all()
+
+
+def test_get_edge_map_merges_edges_with_the_same_vertices():
+    kept_edges, edge_remap = radial_math.get_edge_map([(3, 1), (0, 1), (1, 3), (2, 2), (1, 0)])
+    np.testing.assert_array_equal(kept_edges, (0, 1, 3))
+    np.testing.assert_array_equal(edge_remap, (0, 1, 0, 2, 1))
+
+
+def test_get_edge_map_empty():
+    kept_edges, edge_remap = radial_math.get_edge_map(np.zeros((0, 2)))
+    assert len(kept_edges) == len(edge_remap) == 0
+
+
+def test_decompose_matrices_roundtrip():
+    rng = np.random.default_rng(1)
+    locations = rng.uniform(-10, 10, (50, 3))
+    eulers = rng.uniform(-1.5, 1.5, (50, 3))
+    scales = rng.uniform(.1, 3, (50, 3))
+    scales[::5, 1] *= -1
+    matrices = np.array([compose_matrix(*args) for args in zip(locations, eulers, scales)])
+
+    decomposed = radial_math.decompose_matrices(matrices)
+    recomposed = np.array([compose_matrix(*args) for args in zip(*decomposed)])
+    np.testing.assert_allclose(recomposed, matrices, atol=1e-4)
+    # negative scale is put on the X axis
+    assert (decomposed[2][::5, 0] < 0).all()
+    assert (decomposed[2][:, 1:] > 0).all()
+
+
+def test_decompose_matrices_gimbal_lock():
+    matrix = compose_matrix((0, 0, 0), (.3, pi/2, 0), (1, 1, 1))
+    locations, eulers, scales = radial_math.decompose_matrices(matrix[None])
+    np.testing.assert_allclose(euler_matrix(eulers[0]), matrix[:3, :3], atol=1e-5)
+    assert eulers[0, 2] == 0
+
+
+@pytest.mark.parametrize("name, run", [
+    ("radial_matrices", lambda: radial_math.radial_matrices((0, 0, 0), (0, 0, 1), LARGE_COUNT, np.identity(4))),
+    ("pattern_matrices", lambda: radial_math.pattern_matrices(
+        (0, 0, 0), (0, 0, 1), LARGE_COUNT // 10, np.identity(4), rings=10, ring_offset=1.0, step_height=.01)),
+    ("find_close_pairs", lambda: radial_math.find_close_pairs(
+        np.random.default_rng(2).uniform(0, 10, (LARGE_COUNT, 3)), np.random.default_rng(3).uniform(0, 10, (LARGE_COUNT, 3)), .01)),
+    ("get_weld_map", lambda: radial_math.get_weld_map(LARGE_COUNT, np.arange(1, LARGE_COUNT), np.arange(LARGE_COUNT - 1))),
+    ("decompose_matrices", lambda: radial_math.decompose_matrices(
+        radial_math.radial_matrices((0, 0, 0), (0, 0, 1), LARGE_COUNT, np.identity(4), start=0))),
+])
+def test_large_count_time(name, run):
+    start = time.perf_counter()
+    run()
+    duration = time.perf_counter() - start
+    print("%s %d: %.1f ms" % (name, LARGE_COUNT, duration*1000))
+    assert duration < LARGE_COUNT_TIME_LIMIT
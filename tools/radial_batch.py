@@ -0,0 +1,189 @@
+'''Run radial array jobs on many .blend files in background Blender workers.
+
+Write a job spec, a job or a list of jobs as described in batch.py, for example:
+
+    [{"action": "REFRESH", "objects": ["Gear*"]},
+     {"action": "APPLY", "objects": ["Gear*"]}]
+
+and run it with any Python 3 on files and directories of .blend files:
+
+    python tools/radial_batch.py job.json library/ --blender /path/to/blender --workers 4 --report report.json
+
+Every file is opened by its own background Blender process, processed and saved. Add --output-dir
+to save processed files to another directory and --dry-run to not save them. The report has the
+result of every job on every object of every file and a summary.
+'''
+
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT_PATH = os.path.abspath(__file__)
+STATUSES = ('OK', 'SKIPPED', 'FAILED')
+
+
+def import_addon():
+    '''Import the add-on package from the repository, whatever the folder is named'''
+    spec = importlib.util.spec_from_file_location(
+        "radial_tools", os.path.join(ADDON_DIR, "__init__.py"), submodule_search_locations=[ADDON_DIR])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules["radial_tools"] = addon
+    spec.loader.exec_module(addon)
+    return addon
+
+
+def run_worker(args):
+    '''Process the file Blender was started with, runs inside Blender'''
+    import bpy
+    addon = import_addon()
+    # radial array settings stored in the file are read once the registry is registered
+    addon.register()
+    batch = importlib.import_module(addon.__name__ + ".batch")
+
+    with open(args.job) as f:
+        jobs = json.load(f)
+    start = time.perf_counter()
+    results = batch.run_jobs(bpy.context, jobs)
+    duration = time.perf_counter() - start
+
+    saved = None
+    if not args.dry_run:
+        saved = os.path.join(args.output_dir, os.path.basename(bpy.data.filepath)) if args.output_dir else bpy.data.filepath
+        # compression of the file is kept
+        bpy.ops.wm.save_as_mainfile(filepath=saved)
+
+    with open(args.result, "w") as f:
+        json.dump({"jobs": results, "duration": duration, "saved": saved}, f, indent=2)
+
+
+def find_blend_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "**", "*.blend"), recursive=True))
+        else:
+            files += sorted(glob.glob(path))
+    return files
+
+
+def process_file(args, filepath):
+    '''Run the worker on the file in a background Blender process, returns the file result'''
+    fd, result_path = tempfile.mkstemp(suffix=".json", prefix="radial_batch_")
+    os.close(fd)
+    command = [args.blender, "--background", "--factory-startup", filepath, "--python", SCRIPT_PATH, "--",
+               "--worker", "--job", os.path.abspath(args.job), "--result", result_path]
+    if args.output_dir:
+        command += ["--output-dir", os.path.abspath(args.output_dir)]
+    if args.dry_run:
+        command.append("--dry-run")
+
+    start = time.perf_counter()
+    try:
+        output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=args.timeout,
+                                universal_newlines=True, errors="replace").stdout
+    except subprocess.TimeoutExpired:
+        output = None
+    except OSError as e:
+        # Blender couldn't be started
+        output = str(e)
+    try:
+        with open(result_path) as f:
+            worker_result = json.load(f)
+    except (OSError, ValueError):
+        # worker exits without a result if Blender or the job spec failed
+        worker_result = None
+    finally:
+        os.remove(result_path)
+
+    result = {"file": filepath, "time": time.perf_counter() - start}
+    if output is None:
+        result.update(status='FAILED', error="timed out after %s s" % args.timeout)
+    elif worker_result is None:
+        result.update(status='FAILED', error="worker failed:\n" + "\n".join(output.splitlines()[-20:]))
+    else:
+        result.update(worker_result)
+        failed = any(ob["status"] == 'FAILED' for job in result["jobs"] for ob in job["objects"])
+        result["status"] = 'FAILED' if failed else 'OK'
+    return result
+
+
+def get_summary(results, duration):
+    objects = {status: 0 for status in STATUSES}
+    for result in results:
+        for job in result.get("jobs", ()):
+            for ob in job["objects"]:
+                objects[ob["status"]] += 1
+    return {
+        "files": len(results),
+        "failed_files": sum(result["status"] == 'FAILED' for result in results),
+        "objects": objects,
+        "duration": duration,
+    }
+
+
+def run(args):
+    files = find_blend_files(args.paths)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(process_file, args, filepath) for filepath in files]
+        for i, future in enumerate(as_completed(futures)):
+            result = future.result()
+            results.append(result)
+            print("[%d/%d] %s %s (%.1f s)" % (i + 1, len(files), result["status"], result["file"], result["time"]))
+            if "error" in result:
+                print(result["error"])
+    results.sort(key=lambda result: result["file"])
+
+    summary = get_summary(results, time.perf_counter() - start)
+    with open(args.report, "w") as f:
+        json.dump({"job": os.path.abspath(args.job), "summary": summary, "files": results}, f, indent=2)
+    print("%d files, %d failed, objects: %s, %.1f s. Report saved to %s" % (
+        summary["files"], summary["failed_files"],
+        ", ".join("%d %s" % (summary["objects"][status], status.lower()) for status in STATUSES),
+        summary["duration"], args.report))
+    return 1 if summary["failed_files"] else 0
+
+
+def parse_args():
+    # blender passes script arguments after "--"
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Run radial array jobs on .blend files in background Blender workers")
+    parser.add_argument("job", nargs="?", help="Path of the job spec JSON file")
+    parser.add_argument("paths", nargs="*", help=".blend files, glob patterns or directories searched recursively")
+    parser.add_argument("--blender", default="blender", help="Path of the Blender executable")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of Blender processes run at once")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds one file may take")
+    parser.add_argument("--output-dir", help="Save processed files to this directory instead of overwriting them")
+    parser.add_argument("--dry-run", action="store_true", help="Don't save processed files")
+    parser.add_argument("--report", default="radial_batch_report.json", help="Path of the report JSON file")
+    # options of the worker run inside Blender
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--job", dest="worker_job", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker:
+        args.job = args.worker_job
+    elif args.job is None:
+        parser.error("the job spec is required")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+    else:
+        sys.exit(run(args))
@@ -1,4 +1,5 @@
 import bpy
+from . import geometry_nodes
 
 class RADTOOLS_PT_sidebar(bpy.types.Panel):
     bl_label = "Radial Tools"
@@ -14,11 +15,72 @@ class RADTOOLS_PT_sidebar(bpy.types.Panel):
     def draw(self, context):
         layout = self.layout
         layout.operator("object.duplicate_radially_modal", text="Duplicate Radially", icon='CURVE_NCIRCLE')
-        layout.operator("object.radial_array_modal", text="Radial Array", icon='PHYSICS')
+        layout.operator("object.duplicate_radially", text="Radial Pattern", icon='SURFACE_NCIRCLE')
+        row = layout.row(align=True)
+        row.operator("object.radial_array_modal", text="Radial Array", icon='PHYSICS').backend = 'MODIFIER'
+        if geometry_nodes.is_supported():
+            row.operator("object.radial_array_modal", text="", icon='GEOMETRY_NODES').backend = 'GEOMETRY_NODES'
+        layout.operator("object.apply_radial_array", text="Apply Radial Array", icon='CHECKMARK')
+        layout.operator("object.refresh_radial_arrays", text="Refresh Radial Arrays", icon='FILE_REFRESH')
+        layout.operator_menu_enum("object.convert_radial_array", "backend", text="Convert Radial Array", icon='MODIFIER')
+        layout.operator("object.make_radial_instances_real", text="Make Instances Real", icon='OUTLINER_OB_GROUP_INSTANCE')
+        layout.operator("object.remove_stacked_duplicates", text="Remove Stacked Duplicates", icon='TRASH')
+        row = layout.row(align=True)
+        row.operator("object.export_radial_layout", text="Export Layout", icon='EXPORT')
+        row.operator("object.import_radial_layout", text="Import Layout", icon='IMPORT')
+        
+        col = layout.column(align=True)
+        col.prop(context.scene, "radial_array_use_lod")
+        if context.object.radial_array.modifier:
+            col.prop(context.object.radial_array, "viewport_segments")
+       
+
+class RADTOOLS_PT_timings(bpy.types.Panel):
+    bl_label = "Timings"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Item"
+    bl_parent_id = "RADTOOLS_PT_sidebar"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        from . import profiling
+        settings = context.window_manager.radial_tools_profiling
+        layout = self.layout
+        layout.prop(settings, "enabled")
+        col = layout.column()
+        col.active = settings.enabled
+        col.prop(settings, "use_cprofile")
+        layout.prop(settings, "record_events")
+        layout.prop(settings, "output_dir", text="")
+        
+        if "register" in profiling.registration_times:
+            layout.label(text="Add-on enabled in %.2f ms" % (profiling.registration_times["register"]*1000))
+        
+        if profiling.sessions:
+            session = profiling.sessions[-1]
+            bucket_labels = profiling.get_bucket_labels()
+            box = layout.box()
+            box.label(text=session.name)
+            for stage, timings in sorted(session.stages.items()):
+                row = box.row()
+                row.label(text=stage)
+                row.label(text="%d x %.2f ms, max %.2f ms" % (timings.count, timings.mean*1000, timings.max*1000))
+                # empty buckets are skipped, so the histogram fits the sidebar
+                grid = box.grid_flow(columns=2, even_columns=True, align=True)
+                grid.scale_y = .7
+                for label, count in zip(bucket_labels, timings.histogram):
+                    if count:
+                        grid.label(text="%s: %d" % (label, count))
+                
+        row = layout.row(align=True)
+        row.operator("radtools.save_timings", icon='EXPORT')
+        row.operator("radtools.clear_timings", icon='X', text="")
        
 
 classes = (
     RADTOOLS_PT_sidebar,
+    RADTOOLS_PT_timings,
 )
 
         